@@ -0,0 +1,30 @@
+"""
+Benchmarks of the API and of the swagger generation.
+
+Run them from the repository root, i.e.:
+
+    python -m benchmarks.parallel_introspection
+"""
+import os
+import time
+
+
+def setup_django():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mystore.settings")
+    import django
+    django.setup()
+
+
+def best_of(func, repeat=3, setup=None):
+    """
+    Returns the best wall-clock time (in seconds) of func() over repeat runs,
+    setup() is called (untimed) before each run
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.time()
+        func()
+        timings.append(time.time() - started)
+    return min(timings)
@@ -0,0 +1,67 @@
+"""
+Time spent documenting the fields of a large serializer: the field type
+lookups alone, then the whole swagger definition.
+
+    python -m benchmarks.field_types [fields] [repeat]
+"""
+import sys
+
+from benchmarks import best_of, setup_django
+
+
+def build_serializer(count):
+    """
+    Returns a serializer class of count fields, cycling over the DRF field types
+    """
+    from rest_framework import serializers
+
+    field_factories = (
+        lambda: serializers.CharField(),
+        lambda: serializers.IntegerField(),
+        lambda: serializers.FloatField(),
+        lambda: serializers.DecimalField(max_digits=8, decimal_places=2),
+        lambda: serializers.BooleanField(),
+        lambda: serializers.NullBooleanField(),
+        lambda: serializers.DateField(),
+        lambda: serializers.DateTimeField(),
+        lambda: serializers.EmailField(),
+        lambda: serializers.URLField(),
+        lambda: serializers.ChoiceField(choices=((1, 'one'), (2, 'two'))),
+        lambda: serializers.MultipleChoiceField(choices=(('a', 'A'), ('b', 'B'))),
+        lambda: serializers.ListField(child=serializers.IntegerField()),
+        lambda: serializers.DictField(),
+        lambda: serializers.JSONField(),
+    )
+    attrs = dict(
+        ('field_{}'.format(index), field_factories[index % len(field_factories)]())
+        for index in range(count)
+    )
+    return type(str('LargeSerializer'), (serializers.Serializer,), attrs)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    setup_django()
+    from rest_framework_swagger.docgenerator import DocumentationGenerator
+    from rest_framework_swagger.introspectors import get_data_type
+
+    serializer = build_serializer(count)
+    fields = list(serializer().get_fields().values())
+    generator = DocumentationGenerator(config={})
+
+    def lookups():
+        for _ in range(repeat):
+            for field in fields:
+                get_data_type(field)
+
+    lookup_time = best_of(lookups)
+    definition_time = best_of(lambda: generator.get_definition(serializer))
+    print("serializer of {} fields".format(count))
+    print("get_data_type   {:8.3f}us/field".format(lookup_time / (count * repeat) * 1e6))
+    print("get_definition  {:8.2f}ms".format(definition_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
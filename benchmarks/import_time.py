@@ -0,0 +1,87 @@
+"""
+Import time of the project urlconf, which imports rest_framework_swagger.views.
+
+The swagger generation modules (and yaml, admindocs) must not be imported
+before the first document is generated: this exits with an error status if
+the urlconf pulls any of them.
+
+    python -m benchmarks.import_time [slowest]
+
+The per module timings need python -X importtime (python 3.7+), otherwise
+only the total import time is reported.
+"""
+import json
+import subprocess
+import sys
+
+# modules only needed to generate the swagger documents (markdown and
+# django_filters are not listed, rest_framework.compat imports them anyway)
+DEFERRED_MODULES = (
+    'rest_framework_swagger.docgenerator',
+    'rest_framework_swagger.introspectors',
+    'rest_framework_swagger.urlparser',
+    'rest_framework_swagger.yamlparser',
+    'yaml',
+    'django.contrib.admindocs.views',
+    'django.contrib.admindocs.utils',
+)
+
+# run in a fresh interpreter, prints the deferred modules it imported
+SCRIPT = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mystore.settings')
+os.environ['SWAGGER_WARMUP'] = ''
+import django
+django.setup()
+started = time.time()
+import mystore.urls
+duration = time.time() - started
+print(json.dumps({{
+    'duration': duration,
+    'imported': [name for name in {deferred!r} if name in sys.modules],
+}}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Returns [(cumulative microseconds, module)] from the -X importtime report
+    """
+    timings = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = [field.strip() for field in line[len('import time:'):].split('|')]
+        if len(fields) != 3 or not fields[1].isdigit():
+            continue
+        timings.append((int(fields[1]), fields[2].strip()))
+    return timings
+
+
+def main(slowest=15):
+    command = [sys.executable]
+    if sys.version_info >= (3, 7):
+        command += ['-X', 'importtime']
+    command += ['-c', SCRIPT.format(deferred=DEFERRED_MODULES)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    stdout, stderr = process.communicate()
+    if process.returncode:
+        sys.stderr.write(stderr)
+        sys.exit(process.returncode)
+    result = json.loads(stdout.strip().splitlines()[-1])
+
+    print("urlconf import: {:.1f}ms".format(result['duration'] * 1000))
+    timings = parse_importtime(stderr)
+    if timings:
+        print("slowest imports (cumulative):")
+        for microseconds, module in sorted(timings, reverse=True)[:slowest]:
+            print("  {:>9.1f}ms  {}".format(microseconds / 1000.0, module))
+
+    if result['imported']:
+        print("imported by the urlconf, should be deferred: {}".format(", ".join(result['imported'])))
+        sys.exit(1)
+    print("the swagger generation modules are not imported")
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
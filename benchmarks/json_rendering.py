@@ -0,0 +1,72 @@
+"""
+Rendering time of a page of serialized products with DRF's JSONRenderer and
+with FastJSONRenderer on each of its installed backends.
+
+    python -m benchmarks.json_rendering [products] [repeat]
+"""
+import sys
+
+from benchmarks import best_of, setup_django
+
+
+def build_page(count):
+    """
+    Returns a paginated response body of count serialized (unsaved) products
+    """
+    from collections import OrderedDict
+    from django.utils import timezone
+    from products.constants import PRODUCT_COLORS
+    from products.models import Product
+    from products.serializers import ProductSerializer
+
+    colors = [value for value, label in PRODUCT_COLORS.CHOICES]
+    products = [
+        Product(
+            id=index + 1,
+            name='Product {}'.format(index),
+            description='Description of the product {}'.format(index),
+            price=index * 1.25,
+            color=colors[index % len(colors)],
+            created_date=timezone.now(),
+            in_stock=bool(index % 2),
+        )
+        for index in range(count)
+    ]
+    return OrderedDict((
+        ('count', count),
+        ('next', None),
+        ('previous', None),
+        ('results', ProductSerializer(products, many=True).data),
+    ))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from mystore.renderers import BACKENDS, FastJSONRenderer
+
+    page = build_page(count)
+    renderers = [('DRF JSONRenderer', JSONRenderer())]
+    for backend in ('orjson', 'ujson'):
+        if BACKENDS[backend] is None:
+            print("{} is not installed".format(backend))
+            continue
+        renderer_class = type(str('Renderer'), (FastJSONRenderer,), {'backends': (backend,)})
+        renderers.append(('FastJSONRenderer ' + backend, renderer_class()))
+
+    expected = renderers[0][1].render(page)
+    print("page of {} products, {} bytes".format(count, len(expected)))
+    for name, renderer in renderers:
+        def render():
+            for _ in range(repeat):
+                renderer.render(page)
+        content = renderer.render(page)
+        print("{:26s} {:8.2f}ms {}".format(
+            name, best_of(render) / repeat * 1000, "" if content == expected else "(differs)"))
+
+
+if __name__ == '__main__':
+    main()
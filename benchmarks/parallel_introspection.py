@@ -0,0 +1,113 @@
+"""
+Wall-clock time of the swagger generation of a synthetic 5000 endpoints
+URLconf: serial, with a pool of threads and with a pool of processes.
+
+    python -m benchmarks.parallel_introspection [endpoints] [workers]
+"""
+import json
+import sys
+import types
+
+from benchmarks import best_of, setup_django
+
+
+def build_urlconf(count):
+    """
+    Registers (in sys.modules) an urlconf of count generic views, each one
+    having its own documented list and create methods
+    """
+    from django.conf.urls import url
+    from rest_framework import generics
+    from products.models import Product
+    from products.serializers import ProductSerializer
+
+    module = types.ModuleType('benchmarks_synthetic_urls')
+
+    def documented(action, docstring):
+        def method(self, *args, **kwargs):
+            return getattr(generics.ListCreateAPIView, action)(self, *args, **kwargs)
+        method.__name__ = str(action)
+        method.__doc__ = docstring
+        return method
+
+    urlpatterns = []
+    for i in range(count):
+        view = type(str('SyntheticView{}'.format(i)), (generics.ListCreateAPIView,), {
+            '__module__': module.__name__,
+            'queryset': Product.objects.none(),
+            'serializer_class': ProductSerializer,
+            'list': documented('list', """
+                Lists the synthetic resources {0}
+                ---
+                    tags:
+                        - Synthetic{1}
+                    operationId: listSynthetic{0}
+                """.format(i, i % 10)),
+            'create': documented('create', """
+                Creates a synthetic resource {0}
+                ---
+                    tags:
+                        - Synthetic{1}
+                    operationId: createSynthetic{0}
+                """.format(i, i % 10)),
+        })
+        setattr(module, view.__name__, view)
+        urlpatterns.append(url(
+            r'^synthetic/{}/(?P<group_id>[0-9]+)/items$'.format(i),
+            view.as_view(),
+            name='synthetic-{}'.format(i),
+        ))
+
+    module.urlpatterns = urlpatterns
+    sys.modules[module.__name__] = module
+    return module.__name__
+
+
+def clear_caches():
+    from rest_framework_swagger import docgenerator, introspectors, yamlparser
+    docgenerator.clear_introspected_endpoints()
+    introspectors.clear_view_metadata()
+    yamlparser._yaml_objects.clear()
+    yamlparser._loaded_classes.clear()
+
+
+def main():
+    endpoints = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    setup_django()
+    from rest_framework.utils.encoders import JSONEncoder
+    from rest_framework_swagger.config import get_config
+    from rest_framework_swagger.docgenerator import DocumentationGenerator
+    from rest_framework_swagger.urlparser import UrlParser
+
+    config = get_config().replace(include_module_paths=[])
+    urlparser = UrlParser(config, None)
+    urlparser.urlconf = build_urlconf(endpoints)
+
+    documents = {}
+
+    def generate(label, **options):
+        def run():
+            generator = DocumentationGenerator(config=config, **options)
+            # the documents built by the processes come back unpickled, with their keys in another order
+            documents[label] = json.dumps(generator.get_root(urlparser.get_apis()), cls=JSONEncoder, sort_keys=True)
+        return run
+
+    runs = (
+        ('serial', {}),
+        ('{} threads'.format(workers), {'workers': workers}),
+        ('{} processes'.format(workers), {'workers': workers, 'use_processes': True}),
+    )
+    print("swagger generation of {} endpoints".format(endpoints))
+    serial_time = None
+    for label, options in runs:
+        elapsed = best_of(generate(label, **options), setup=clear_caches)
+        serial_time = serial_time or elapsed
+        print("{:<15} {:8.2f}s  x{:.2f}".format(label, elapsed, serial_time / elapsed))
+
+    assert len(set(documents.values())) == 1, "parallel generation changed the document"
+
+
+if __name__ == '__main__':
+    main()
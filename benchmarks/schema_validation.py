@@ -0,0 +1,58 @@
+"""
+Cost of rejecting a malformed product payload: the compiled JSON schema
+pre-validation versus ProductSerializer.is_valid(), plus the overhead of the
+pre-validation on a valid payload.
+
+    python -m benchmarks.schema_validation [repeat]
+"""
+import sys
+
+from benchmarks import best_of, setup_django
+
+VALID_PAYLOAD = {
+    'name': 'Lamp',
+    'description': 'A desk lamp',
+    'price': 24.9,
+    'color': 3,
+    'in_stock': True,
+}
+
+MALFORMED_PAYLOADS = (
+    ('missing fields', {'name': 'Lamp'}),
+    ('object for a scalar', dict(VALID_PAYLOAD, price={'amount': 24.9})),
+    ('array for a number', dict(VALID_PAYLOAD, price=[24.9])),
+    ('not an object', ['Lamp', 24.9]),
+)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    setup_django()
+    from rest_framework.exceptions import ValidationError
+    from mystore.validation import get_validator, validate_payload
+    from products.serializers import ProductSerializer
+
+    get_validator(ProductSerializer)
+
+    def pre_validation(payload):
+        for _ in range(repeat):
+            try:
+                validate_payload(ProductSerializer, payload)
+            except ValidationError:
+                pass
+
+    def serializer_validation(payload):
+        for _ in range(repeat):
+            ProductSerializer(data=payload).is_valid()
+
+    print("{:20s} {:>14s} {:>14s}".format("payload", "pre-validation", "is_valid"))
+    for name, payload in MALFORMED_PAYLOADS + (('valid', VALID_PAYLOAD),):
+        pre_time = best_of(lambda: pre_validation(payload))
+        serializer_time = best_of(lambda: serializer_validation(payload))
+        print("{:20s} {:12.2f}us {:12.2f}us".format(
+            name, pre_time / repeat * 1e6, serializer_time / repeat * 1e6))
+
+
+if __name__ == '__main__':
+    main()
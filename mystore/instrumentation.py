@@ -0,0 +1,259 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request instrumentation.
+
+When ``INSTRUMENTATION_ENABLED`` is set, ``InstrumentationMiddleware`` records
+for every request the time spent in the view, the number and the duration of
+the SQL queries, the time spent serializing data and the response size.
+The timings are sent back in a ``Server-Timing`` header and aggregated per view
+in ``registry``, which is exposed in the Prometheus text format by
+``metrics_view``. Other modules can expose their own metrics through the
+``INSTRUMENTATION_COLLECTORS`` setting: dotted paths of functions returning
+``(name, type, description, value)`` tuples.
+
+The request duration of the streamed responses (i.e. the swagger documents)
+only covers the time until the response is returned, not the streaming: they
+get no ``Server-Timing`` header.
+
+When disabled the middleware removes itself from the stack (``MiddlewareNotUsed``)
+and ``timer`` is a no-op, so the only cost is a thread-local lookup.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from django.utils.module_loading import import_string
+from rest_framework import serializers
+
+_local = threading.local()
+
+
+def is_enabled():
+    return getattr(settings, 'INSTRUMENTATION_ENABLED', False)
+
+
+class RequestMetrics(object):
+    """
+    Metrics of the request being processed by the current thread
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.view = None
+        self.timings = OrderedDict()
+
+    def add(self, name, duration):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+
+
+def get_current_metrics():
+    return getattr(_local, 'metrics', None)
+
+
+class timer(object):
+    """
+    Context manager adding the time spent in its block to the current request metrics.
+    i.e.:
+        with timer('serializer'):
+            data = serializer.data
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.metrics = None
+
+    def __enter__(self):
+        self.metrics = get_current_metrics()
+        if self.metrics is not None:
+            self.started = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.metrics is not None:
+            self.metrics.add(self.name, time.time() - self.started)
+
+
+class MetricsRegistry(object):
+    """
+    Aggregates the request metrics per view (count and sum of each measure)
+    """
+    MEASURES = OrderedDict((
+        ('request_duration_seconds', "Time spent handling the request"),
+        ('db_queries', "Number of SQL queries run by the request"),
+        ('db_duration_seconds', "Time spent running SQL queries"),
+        ('serializer_duration_seconds', "Time spent serializing data"),
+        ('response_size_bytes', "Size of the response body"),
+    ))
+
+    def __init__(self, namespace='mystore'):
+        self.namespace = namespace
+        self.lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, **measures):
+        with self.lock:
+            view_measures = self.views.setdefault(view, dict((name, [0, 0.0]) for name in self.MEASURES))
+            for name, value in measures.items():
+                if value is None:
+                    continue
+                view_measures[name][0] += 1
+                view_measures[name][1] += value
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+
+    def render(self):
+        """
+        Returns the aggregated metrics in the Prometheus text exposition format
+        """
+        with self.lock:
+            views = sorted((view, dict((name, list(values)) for name, values in measures.items()))
+                           for view, measures in self.views.items())
+        lines = []
+        for name, description in self.MEASURES.items():
+            metric = "{}_{}".format(self.namespace, name)
+            lines.append("# HELP {} {}".format(metric, description))
+            lines.append("# TYPE {} summary".format(metric))
+            for view, measures in views:
+                count, total = measures[name]
+                label = 'view="{}"'.format(escape_label(view))
+                lines.append("{}_count{{{}}} {}".format(metric, label, count))
+                lines.append("{}_sum{{{}}} {!r}".format(metric, label, float(total)))
+        for collector in getattr(settings, 'INSTRUMENTATION_COLLECTORS', ()):
+            for name, metric_type, description, value in import_string(collector)():
+                lines.append("# HELP {} {}".format(name, description))
+                lines.append("# TYPE {} {}".format(name, metric_type))
+                lines.append("{} {!r}".format(name, value))
+        return "\n".join(lines) + "\n"
+
+
+class CountingQueriesLog(deque):
+    """
+    The queries_log of a connection, also counting the queries and their time
+    since the connection was opened: unlike the log (bounded, so rotating),
+    the counters can be compared before and after a request
+    """
+
+    def __init__(self, queries_log):
+        super(CountingQueriesLog, self).__init__(queries_log, queries_log.maxlen)
+        self.count = 0
+        self.time = 0.0
+
+    def append(self, query):
+        super(CountingQueriesLog, self).append(query)
+        self.count += 1
+        self.time += float(query['time'])
+
+    def get_counters(self):
+        return self.count, self.time
+
+
+def get_queries_log(connection):
+    if not isinstance(connection.queries_log, CountingQueriesLog):
+        connection.queries_log = CountingQueriesLog(connection.queries_log)
+    return connection.queries_log
+
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = MetricsRegistry()
+
+
+class InstrumentationMiddleware(object):
+    """
+    Should be the first middleware so its timings cover the whole stack
+    """
+
+    def __init__(self):
+        if not is_enabled():
+            raise MiddlewareNotUsed()
+
+    def process_request(self, request):
+        metrics = _local.metrics = RequestMetrics()
+        metrics.queries_start = []
+        for connection in connections.all():
+            metrics.queries_start.append(
+                (connection, connection.force_debug_cursor, get_queries_log(connection).get_counters())
+            )
+            connection.force_debug_cursor = True
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = get_current_metrics()
+        if metrics is not None:
+            metrics.view = "{}.{}".format(view_func.__module__, view_func.__name__)
+
+    def process_response(self, request, response):
+        metrics = get_current_metrics()
+        if metrics is None:
+            return response
+        _local.metrics = None
+
+        query_count = 0
+        query_time = 0.0
+        for connection, force_debug_cursor, (start_count, start_time) in metrics.queries_start:
+            count, total_time = get_queries_log(connection).get_counters()
+            query_count += count - start_count
+            query_time += total_time - start_time
+            connection.force_debug_cursor = force_debug_cursor
+
+        if response.streaming:
+            response_size = None
+        else:
+            response_size = len(response.content)
+
+        duration = time.time() - metrics.started
+        serializer_time = metrics.timings.get('serializer')
+
+        server_timing = [
+            'app;dur={:.2f}'.format(duration * 1000),
+            'db;dur={:.2f};desc="{} queries"'.format(query_time * 1000, query_count),
+        ]
+        for name, value in metrics.timings.items():
+            server_timing.append('{};dur={:.2f}'.format(name, value * 1000))
+        if not response.streaming:
+            # the timings would miss the streaming
+            response['Server-Timing'] = ', '.join(server_timing)
+
+        registry.record(
+            metrics.view or 'unresolved',
+            request_duration_seconds=duration,
+            db_queries=query_count,
+            db_duration_seconds=query_time,
+            serializer_duration_seconds=serializer_time,
+            response_size_bytes=response_size,
+        )
+        return response
+
+
+def metrics_view(request):
+    """
+    Exposes the aggregated request metrics to Prometheus
+    """
+    if not is_enabled():
+        raise Http404()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class TimedSerializerMixin(object):
+    """
+    Accounts the serialization of the data in the "serializer" timing
+    """
+
+    @property
+    def data(self):
+        with timer('serializer'):
+            return super(TimedSerializerMixin, self).data
+
+
+class TimedListSerializer(TimedSerializerMixin, serializers.ListSerializer):
+    """
+    Used as ``Meta.list_serializer_class`` so ``many=True`` serializations are timed too
+    """
+    pass
@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+Parsers of the non JSON payloads.
+"""
+import msgpack
+from msgpack.exceptions import UnpackException
+from django.utils import six
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, TypeError, UnpackException) as exc:
+            # TypeError: i.e. an array as a map key
+            raise ParseError('MessagePack parse error - {}'.format(six.text_type(exc)))
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Renderers: a faster drop-in for DRF's JSONRenderer, and MessagePack.
+
+``FastJSONRenderer`` encodes with the first available of its ``backends``:
+orjson, ujson (5+, for its ``default`` hook) or the stdlib json (DRF's own
+rendering). orjson and ujson 5 require Python 3, on Python 2 the renderer is
+DRF's. The non JSON types (datetimes, Decimal, lazy translation strings,
+UUIDs, querysets...) go through DRF's ``JSONEncoder.default``, so the output
+matches DRF's (i.e. milliseconds datetimes). Pretty-printed or ASCII only
+responses (i.e. the browsable API) are left to DRF.
+
+Listed first in ``REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES']`` it is also the
+renderer of the swagger documents, which look up the first json renderer.
+
+``MessagePackRenderer`` encodes the same data as the JSON renderers (the
+non MessagePack types going through ``JSONEncoder.default`` too) for the
+clients asking for ``application/msgpack``.
+"""
+import msgpack
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+    # older versions have no default hook for the non JSON types
+    ujson.dumps([], default=str)
+except (ImportError, TypeError):
+    ujson = None
+
+# escaped, as by DRF, so the JSON can be embedded in a <script>
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+default = JSONEncoder().default
+
+
+def orjson_dumps(data):
+    # the datetimes too, orjson would write their microseconds
+    return orjson.dumps(data, default=default, option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS)
+
+
+def ujson_dumps(data):
+    return ujson.dumps(data, default=default, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+# backend name => dumps(data) returning utf-8 bytes, None when not installed
+BACKENDS = {
+    'orjson': orjson_dumps if orjson is not None else None,
+    'ujson': ujson_dumps if ujson is not None else None,
+    # DRF's rendering
+    'json': None,
+}
+
+
+def get_dumps(backends):
+    """
+    Returns the dumps function of the first installed backend, None for the stdlib json
+    """
+    for backend in backends:
+        if backend == 'json':
+            return None
+        if BACKENDS.get(backend) is not None:
+            return BACKENDS[backend]
+    return None
+
+
+class FastJSONRenderer(JSONRenderer):
+    # by preference
+    backends = ('orjson', 'ujson', 'json')
+
+    def __init__(self):
+        self.dumps = get_dumps(self.backends)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or self.dumps is None or self.ensure_ascii or not self.compact:
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = self.dumps(data)
+        except TypeError:
+            # i.e. integers too large for orjson
+            return super(FastJSONRenderer, self).render(data, accepted_media_type, renderer_context)
+        for separator, escaped in LINE_SEPARATORS:
+            ret = ret.replace(separator, escaped)
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return bytes()
+        return msgpack.packb(data, default=default, use_bin_type=True)
@@ -43,6 +43,7 @@ INSTALLED_APPS = (
 )
 
 MIDDLEWARE_CLASSES = (
+    'mystore.instrumentation.InstrumentationMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -57,6 +58,18 @@ MIDDLEWARE_CLASSES = (
 
 ROOT_URLCONF = 'mystore.urls'
 
+# Per-request timings, query counts (Server-Timing header) and Prometheus metrics on /metrics
+INSTRUMENTATION_ENABLED = os.environ.get('INSTRUMENTATION_ENABLED', '').lower() in ('1', 'true', 'yes')
+INSTRUMENTATION_COLLECTORS = (
+    'rest_framework_swagger.cache.get_metrics',
+)
+
+# Store the rendered JSON of the products on write, the products list concatenates them
+PRODUCT_FRAGMENTS_ENABLED = os.environ.get('PRODUCT_FRAGMENTS_ENABLED', '').lower() in ('1', 'true', 'yes')
+
+# Reject the malformed product payloads with their swagger definition before the serializer is built
+SCHEMA_VALIDATION_ENABLED = os.environ.get('SCHEMA_VALIDATION_ENABLED', '').lower() in ('1', 'true', 'yes')
+
 TEMPLATES = (
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -137,6 +150,11 @@ STATICFILES_DIRS = [
 STATICFILES_STORAGE = 'whitenoise.django.GzipManifestStaticFilesStorage'
 
 REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': (
+        # orjson or ujson when installed (also renders the swagger documents)
+        'mystore.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20
 }
@@ -145,9 +163,6 @@ SWAGGER_GLOBAL_SETTINGS = {
     'include_module_paths': [],
     'exclude_url_patterns': [],
     'exclude_namespaces': [],
-    'produces': [
-        'application/json'
-    ],
     'requires_authentication': True,
     'requires_superuser': False,
     'basePath': '/',
@@ -158,6 +173,8 @@ SWAGGER_GLOBAL_SETTINGS = {
     },
     "securityDefinitions": {},
     "security": [],
+    # hoist the repeated schemas and parameters (i.e. the pagination envelopes)
+    'dedupe': True,
 }
 
 SWAGGER_LOCAL_SETTINGS = {
@@ -171,5 +188,24 @@ SWAGGER_LOCAL_SETTINGS = {
 
 }
 
+# The swagger documents are generated by one worker and shared with the others of the host
+# (versioned with the sources of the documented modules, so edits invalidate them)
+SWAGGER_CACHE = {
+    'BACKEND': 'rest_framework_swagger.cache.FileBackend',
+    'OPTIONS': {
+        'directory': os.path.join(BASE_DIR, '.swagger-cache'),
+        'max_entries': 64,
+    },
+    # rebuild the documents hourly, serving the previous one meanwhile
+    'MAX_AGE': 3600,
+    'STALE_WHILE_REVALIDATE': True,
+}
+# changes with each deployed slug (requires the heroku dyno metadata feature)
+SWAGGER_CACHE_VERSION = os.environ.get('HEROKU_SLUG_COMMIT', '')
+
+# Generate the swagger documents when a worker starts: '' (disabled), 'background' or 'blocking'
+# (enabled by mystore.wsgi, so management commands don't pay for it; see mystore.wsgi for the trade-off)
+SWAGGER_WARMUP = os.environ.get('SWAGGER_WARMUP', '')
+
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = False
@@ -1,8 +1,11 @@
 from django.conf.urls import include, url
 from django.contrib import admin
 
+from .instrumentation import metrics_view
+
 urlpatterns = [
     url(r'^admin/', include(admin.site.urls)),
     url(r'^', include('products.urls')),
     url(r'^api/', include('rest_framework_swagger.urls')),
+    url(r'^metrics$', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+JSON schema pre-validation of the request payloads.
+
+When ``SCHEMA_VALIDATION_ENABLED`` is set, the views using
+``SchemaValidationMixin`` check the JSON payloads of the POST, PUT and PATCH
+requests against the swagger definition of their serializer before the
+serializer is built, and reject the malformed ones with a 400.
+
+The definition is compiled into a ``jsonschema`` validator once per serializer.
+It is loosened so it never rejects what the serializer would accept: the
+scalars are checked against the JSON types the DRF fields coerce (i.e. "12.5"
+or true for a float), the strings aren't checked (DRF's CharField turns any
+value into a string), the enums accept their string values, null is left to
+the serializer and the read only or unknown properties are ignored. What's left
+to reject early are the payloads that aren't objects, the missing required
+fields, the objects or arrays given for numbers, booleans or arrays and the
+unknown choices of the properties documented with an enum, reported with the
+messages of the DRF fields.
+"""
+import threading
+
+from django.conf import settings
+from django.utils import six
+from jsonschema import Draft4Validator
+from rest_framework.exceptions import ValidationError
+from rest_framework import fields
+from rest_framework.serializers import Serializer
+from rest_framework.settings import api_settings
+
+VALIDATED_METHODS = frozenset(('POST', 'PUT', 'PATCH'))
+
+# swagger type => JSON types the DRF fields accept, the strings accept them all
+ACCEPTED_TYPES = {
+    'integer': ['integer', 'number', 'string', 'null'],
+    'number': ['number', 'string', 'boolean', 'null'],
+    'boolean': ['boolean', 'integer', 'string', 'null'],
+    'array': ['array', 'null'],
+}
+# swagger type => (DRF field, key of its type error message)
+TYPE_ERRORS = {
+    'integer': (fields.IntegerField, 'invalid'),
+    'number': (fields.FloatField, 'invalid'),
+    'boolean': (fields.BooleanField, 'invalid'),
+    'array': (fields.ListField, 'not_a_list'),
+}
+
+# (serializer class, partial) => Draft4Validator
+_validators = {}
+_validators_lock = threading.Lock()
+
+
+def is_enabled():
+    return getattr(settings, 'SCHEMA_VALIDATION_ENABLED', False)
+
+
+def build_property_schema(prop):
+    """
+    Returns the loosened schema of a definition property
+    """
+    schema = {}
+    # objects (i.e. JSONField) and nested serializers are left to the serializer
+    if prop.get('type') in ACCEPTED_TYPES and '$ref' not in prop:
+        schema['type'] = ACCEPTED_TYPES[prop['type']]
+        # for the error messages
+        schema['x-type'] = prop['type']
+    if prop.get('enum'):
+        enum = list(prop['enum'])
+        enum.extend(six.text_type(value) for value in prop['enum'] if not isinstance(value, six.string_types))
+        enum.append(None)
+        schema['enum'] = enum
+    return schema
+
+
+def build_schema(serializer_class, partial=False):
+    """
+    Returns the loosened JSON schema of the swagger definition of a serializer,
+    without required properties when partial
+    """
+    from rest_framework_swagger.docgenerator import DocumentationGenerator
+
+    definition = DocumentationGenerator(config={}).get_definition(serializer_class)
+    properties = dict(
+        (name, build_property_schema(prop))
+        for name, prop in definition.get('properties', {}).items()
+        if not prop.get('readOnly')
+    )
+    schema = {
+        'type': 'object',
+        'properties': properties,
+    }
+    required = [name for name in definition.get('required', []) if name in properties]
+    if required and not partial:
+        schema['required'] = required
+    Draft4Validator.check_schema(schema)
+    return schema
+
+
+def get_validator(serializer_class, partial=False):
+    """
+    Returns the validator of a serializer, compiled once
+    """
+    key = (serializer_class, partial)
+    validator = _validators.get(key)
+    if validator is None:
+        validator = Draft4Validator(build_schema(serializer_class, partial))
+        with _validators_lock:
+            _validators[key] = validator
+    return validator
+
+
+def get_message(error):
+    """
+    Returns the message the DRF field (or serializer) gives for a validation error
+    """
+    value = error.instance
+    message = None
+    if error.validator == 'type' and not error.path:
+        message = Serializer.default_error_messages.get('invalid')
+    elif error.validator == 'type' and error.schema.get('x-type') in TYPE_ERRORS:
+        field_class, key = TYPE_ERRORS[error.schema['x-type']]
+        message = field_class.default_error_messages.get(key)
+    elif error.validator == 'enum':
+        message = fields.ChoiceField.default_error_messages.get('invalid_choice')
+    if message is None:
+        return error.message
+    return six.text_type(message).format(input=value, input_type=type(value).__name__, datatype=type(value).__name__)
+
+
+def get_errors(validator, data):
+    """
+    Returns the errors of a payload in the DRF format: {field: [messages]}
+    """
+    errors = {}
+    for error in validator.iter_errors(data):
+        if error.validator == 'required':
+            # reported on the object, listed per field below
+            continue
+        field = error.path[0] if error.path else api_settings.NON_FIELD_ERRORS_KEY
+        errors.setdefault(field, []).append(get_message(error))
+    if isinstance(data, dict):
+        for name in validator.schema.get('required', ()):
+            if name not in data:
+                errors[name] = [fields.Field.default_error_messages['required']]
+    return errors
+
+
+def validate_payload(serializer_class, data, partial=False):
+    """
+    Raises a ValidationError if the payload can't be valid for the serializer
+    """
+    errors = get_errors(get_validator(serializer_class, partial), data)
+    if errors:
+        raise ValidationError(errors)
+
+
+def is_json(request):
+    return request.content_type.split(';')[0].strip().lower() == 'application/json'
+
+
+class SchemaValidationMixin(object):
+    """
+    Pre-validates the JSON payloads of the POST, PUT and PATCH requests
+    (see the module docstring), once the request is authenticated and allowed
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super(SchemaValidationMixin, self).initial(request, *args, **kwargs)
+        if is_enabled() and request.method in VALIDATED_METHODS and is_json(request):
+            validate_payload(self.get_serializer_class(), request.data, partial=request.method == 'PATCH')
@@ -10,6 +10,11 @@ https://docs.djangoproject.com/en/1.7/howto/deployment/wsgi/
 
 import os
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mystore.settings")
+# each gunicorn worker builds the swagger documents as it boots: the first
+# swagger request is fast, but every worker imports the deferred generation
+# modules and introspects the API (in a thread, after the boot). Set
+# SWAGGER_WARMUP='' to defer both to the first swagger request instead.
+os.environ.setdefault("SWAGGER_WARMUP", "background")
 
 from django.core.wsgi import get_wsgi_application
 from whitenoise.django import DjangoWhiteNoise
@@ -1,7 +1,22 @@
 from __future__ import unicode_literals
 
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ProductsConfig(AppConfig):
     name = 'products'
+
+    def ready(self):
+        """
+        The pre-rendered products JSON follows the products when enabled (see products.fragments)
+        """
+        from django.conf import settings
+
+        if not getattr(settings, 'PRODUCT_FRAGMENTS_ENABLED', False):
+            return
+        from . import fragments
+
+        Product = self.get_model('Product')
+        post_save.connect(fragments.product_saved, sender=Product, dispatch_uid='product_fragment_saved')
+        post_delete.connect(fragments.product_deleted, sender=Product, dispatch_uid='product_fragment_deleted')
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+"""
+Pre-rendered product JSON.
+
+When ``PRODUCT_FRAGMENTS_ENABLED`` is set, every saved product stores its
+``ProductSerializer`` JSON, rendered by the JSON renderer of the API, in
+``ProductFragment``. The products list then assembles its JSON pages by
+concatenating the stored fragments instead of serializing the products.
+
+The fragments follow the products through their post_save and post_delete
+signals, connected by ``ProductsConfig`` when enabled: the raw saves of the
+fixtures drop the fragment so it's rendered again on the next read. Each
+fragment stores the version of the serializer and renderer it was rendered
+with (``get_fragment_version()``), the fragments of another version are
+rendered again when read.
+
+The writes bypassing the signals (``QuerySet.update()``, raw SQL, or any
+write while disabled) leave stale fragments behind: ``manage.py
+rebuild_product_fragments`` renders them all again, i.e. before enabling
+them again.
+"""
+import hashlib
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.encoding import force_bytes
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+
+from .models import Product, ProductFragment
+from .serializers import ProductSerializer
+
+# renderer class => fragment version
+_versions = {}
+
+
+def is_enabled():
+    return getattr(settings, 'PRODUCT_FRAGMENTS_ENABLED', False)
+
+
+def get_renderer_class():
+    """
+    Returns the JSON renderer of the API (the first json one of DEFAULT_RENDERER_CLASSES)
+    """
+    for renderer_class in api_settings.DEFAULT_RENDERER_CLASSES:
+        if renderer_class.format == 'json':
+            return renderer_class
+    return JSONRenderer
+
+
+def get_fragment_version():
+    """
+    Returns the hash of the serializer fields and of the renderer the fragments are rendered with
+    """
+    renderer_class = get_renderer_class()
+    if renderer_class not in _versions:
+        signature = '{}.{}\n{!r}'.format(renderer_class.__module__, renderer_class.__name__, ProductSerializer())
+        _versions[renderer_class] = hashlib.md5(force_bytes(signature)).hexdigest()
+    return _versions[renderer_class]
+
+
+def render_fragment(product):
+    return get_renderer_class()().render(ProductSerializer(product).data)
+
+
+def store_fragment(product):
+    content = render_fragment(product)
+    ProductFragment.objects.update_or_create(
+        product_id=product.pk,
+        defaults={'content': content, 'version': get_fragment_version()},
+    )
+    return content
+
+
+def delete_fragment(product):
+    ProductFragment.objects.filter(product_id=product.pk).delete()
+
+
+def get_fragments(product_ids):
+    """
+    Returns the fragments of products, in order, rendering (and storing) the missing or outdated ones
+    """
+    version = get_fragment_version()
+    fragments = dict(
+        (product_id, content)
+        for product_id, content, fragment_version in ProductFragment.objects.filter(
+            product_id__in=product_ids).values_list('product_id', 'content', 'version')
+        if fragment_version == version
+    )
+    missing = [product_id for product_id in product_ids if product_id not in fragments]
+    if missing:
+        for product in Product.objects.filter(pk__in=missing):
+            fragments[product.pk] = store_fragment(product)
+    return [bytes(fragments[product_id]) for product_id in product_ids if product_id in fragments]
+
+
+def can_render(request):
+    """
+    Whether the response is the plain (not indented) JSON of the fragments renderer
+    """
+    renderer = request.accepted_renderer
+    return type(renderer) is get_renderer_class() and request.accepted_media_type == renderer.media_type
+
+
+def get_list_response(view, queryset):
+    """
+    Returns the response of a products list, paginated by the view, made of the stored fragments
+    """
+    product_ids = queryset.values_list('pk', flat=True)
+    page = view.paginate_queryset(product_ids)
+    results = b'[' + b','.join(get_fragments(list(product_ids if page is None else page))) + b']'
+
+    renderer = view.request.accepted_renderer
+    if page is None:
+        content = results
+    else:
+        # the envelope of the paginator, around the fragments
+        encoder = renderer.encoder_class(
+            ensure_ascii=getattr(renderer, 'ensure_ascii', True),
+            separators=(',', ':') if getattr(renderer, 'compact', True) else (', ', ': '),
+        )
+        items = []
+        for key, value in view.get_paginated_response([]).data.items():
+            value = results if key == 'results' else encoder.encode(value).encode('utf-8')
+            items.append(encoder.encode(key).encode('utf-8') + b':' + value)
+        content = b'{' + b','.join(items) + b'}'
+
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type = '{}; charset={}'.format(content_type, renderer.charset)
+    return HttpResponse(content, content_type=content_type)
+
+
+def product_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        store_fragment(instance)
+    else:
+        delete_fragment(instance)
+
+
+def product_deleted(sender, instance, **kwargs):
+    delete_fragment(instance)
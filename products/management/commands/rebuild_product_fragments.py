@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...fragments import get_fragment_version, render_fragment
+from ...models import Product, ProductFragment
+
+
+class Command(BaseCommand):
+    help = "Renders again the stored JSON of all the products (see products.fragments)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="number of fragments inserted per query")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        version = get_fragment_version()
+        count = 0
+        with transaction.atomic():
+            # the fragments of the deleted products go too
+            ProductFragment.objects.all().delete()
+            batch = []
+            for product in Product.objects.order_by('pk').iterator():
+                batch.append(ProductFragment(product_id=product.pk, content=render_fragment(product), version=version))
+                if len(batch) >= batch_size:
+                    ProductFragment.objects.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            ProductFragment.objects.bulk_create(batch)
+            count += len(batch)
+        self.stdout.write("{} product fragments rendered".format(count))
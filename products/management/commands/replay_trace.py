@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+Replays recorded request traces against the API and reports, per endpoint,
+the throughput, the p50/p95/p99 latencies and the number of SQL queries.
+
+A trace is a JSON lines file, one request per line:
+
+    {"method": "GET", "path": "/products?page=2", "offset": 0.05}
+    {"method": "POST", "path": "/products", "offset": 0.25, "body": {"name": "foo", ...}}
+
+``offset`` is the time (in seconds) at which the request was recorded, relative
+to the beginning of the trace. ``body`` can be a JSON object or a raw string
+and ``headers`` an optional dict of extra HTTP headers.
+
+By default the requests go through an in-process WSGI client (so the SQL
+queries can be counted); use ``--url`` to target a running server instead.
+"""
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.urlresolvers import Resolver404, resolve
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import Client
+from django.utils import six
+from django.utils.six.moves import queue, urllib
+from mystore.instrumentation import get_queries_log
+
+# the methods replayed in-process against the configured database
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+
+def load_trace(trace_path):
+    """
+    Reads a trace file and returns the list of recorded requests sorted by offset
+    """
+    entries = []
+    with open(trace_path) as trace_file:
+        for line_number, line in enumerate(trace_file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise CommandError("{}:{} is not valid JSON ({})".format(trace_path, line_number, e))
+            if 'path' not in record:
+                raise CommandError("{}:{} has no path".format(trace_path, line_number))
+
+            body = record.get('body')
+            if body is not None and not isinstance(body, (six.binary_type, six.text_type)):
+                body = json.dumps(body)
+            entries.append({
+                'method': record.get('method', 'GET').upper(),
+                'path': record['path'],
+                'body': body,
+                'content_type': record.get('content_type', 'application/json'),
+                'headers': record.get('headers', {}),
+                'offset': float(record.get('offset', 0)),
+            })
+    return sorted(entries, key=lambda entry: entry['offset'])
+
+
+def get_endpoint_name(entry):
+    """
+    Groups the requests by http method and url name (i.e. "GET product-detail")
+    """
+    path = urllib.parse.urlparse(entry['path']).path
+    try:
+        name = resolve(path).view_name
+    except Resolver404:
+        name = path
+    return "{} {}".format(entry['method'], name)
+
+
+def percentile(sorted_values, percent):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = int(math.ceil(percent / 100.0 * len(sorted_values))) - 1
+    return sorted_values[max(0, min(rank, len(sorted_values) - 1))]
+
+
+class InProcessReplayer(object):
+    """
+    Sends the requests through django's test client (no network involved)
+    and counts the queries executed on the default database
+    """
+    counts_queries = True
+
+    def __init__(self):
+        self.local = threading.local()
+
+    def send(self, entry):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = Client()
+
+        extra = dict(
+            ('HTTP_' + key.upper().replace('-', '_'), value)
+            for key, value in entry['headers'].items()
+        )
+        # the connections are per thread, so are their counters (unlike
+        # CaptureQueriesContext, which toggles the global reset_queries receiver)
+        connection = connections[DEFAULT_DB_ALIAS]
+        queries_log = get_queries_log(connection)
+        force_debug_cursor = connection.force_debug_cursor
+        connection.force_debug_cursor = True
+        queries_start, _ = queries_log.get_counters()
+        try:
+            response = client.generic(
+                entry['method'],
+                entry['path'],
+                data=entry['body'] or '',
+                content_type=entry['content_type'],
+                **extra
+            )
+            # consume streamed responses so they are part of the timing
+            if getattr(response, 'streaming', False):
+                b''.join(response.streaming_content)
+        finally:
+            connection.force_debug_cursor = force_debug_cursor
+        return response.status_code, queries_log.get_counters()[0] - queries_start
+
+    def close(self):
+        connections[DEFAULT_DB_ALIAS].close()
+
+
+class HTTPReplayer(object):
+    """
+    Sends the requests to a running server
+    """
+    counts_queries = False
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def send(self, entry):
+        body = entry['body']
+        if body is not None and not isinstance(body, six.binary_type):
+            body = body.encode('utf-8')
+        request = urllib.request.Request(self.base_url + entry['path'], data=body)
+        request.get_method = lambda: entry['method']
+        if body is not None:
+            request.add_header('Content-Type', entry['content_type'])
+        for key, value in entry['headers'].items():
+            request.add_header(key, value)
+        try:
+            response = urllib.request.urlopen(request)
+        except urllib.error.HTTPError as e:
+            e.read()
+            return e.code, None
+        response.read()
+        return response.getcode(), None
+
+    def close(self):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Replays a request trace and reports throughput, latency percentiles and query counts per endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('trace', help="path of the JSON lines trace file")
+        parser.add_argument('--url', default=None,
+                            help="base url of a running server (default: in-process WSGI client)")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="number of concurrent clients")
+        parser.add_argument('--repeat', type=int, default=1,
+                            help="number of times the trace is replayed")
+        parser.add_argument('--speed', type=float, default=0,
+                            help="replay the trace timing at this speed factor (1 = recorded pace), "
+                                 "0 sends the requests as fast as possible")
+        parser.add_argument('--test-database', action='store_true', default=False,
+                            help="replay against a throwaway test database loaded with the initial_products fixture "
+                                 "(required by the traces writing in-process)")
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        entries = load_trace(options['trace'])
+        if not entries:
+            raise CommandError("{} does not contain any request".format(options['trace']))
+
+        if not options['test_database'] and not options['url']:
+            unsafe = sorted(set(entry['method'] for entry in entries) - SAFE_METHODS)
+            if unsafe:
+                raise CommandError(
+                    "the trace contains {} requests, replay it with --test-database (or --url)".format(
+                        ", ".join(unsafe)))
+
+        trace_duration = entries[-1]['offset']
+        schedule = []
+        for iteration in range(options['repeat']):
+            for entry in entries:
+                schedule.append((entry['offset'] + iteration * trace_duration, entry))
+
+        old_name = temp_dir = None
+        if options['test_database'] and not options['url']:
+            connection = connections[DEFAULT_DB_ALIAS]
+            old_name = connection.settings_dict['NAME']
+            if connection.vendor == 'sqlite':
+                # an in-memory database would only exist for the connection of this
+                # thread, the workers (having their own connections) need a file
+                temp_dir = tempfile.mkdtemp(prefix='replay-trace-')
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(temp_dir, 'test.sqlite3')
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            call_command('loaddata', 'initial_products', verbosity=0)
+
+        try:
+            if options['url']:
+                replayer = HTTPReplayer(options['url'])
+            else:
+                replayer = InProcessReplayer()
+            results, elapsed = self.replay(replayer, schedule, options['concurrency'], options['speed'])
+        finally:
+            if old_name is not None:
+                connections[DEFAULT_DB_ALIAS].creation.destroy_test_db(old_name, verbosity=0)
+            if temp_dir is not None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+        self.report(results, elapsed, replayer.counts_queries)
+
+    def replay(self, replayer, schedule, concurrency, speed):
+        pending = queue.Queue()
+        for item in schedule:
+            pending.put(item)
+
+        results = []
+        results_lock = threading.Lock()
+        started_at = time.time()
+
+        def worker():
+            try:
+                while True:
+                    try:
+                        offset, entry = pending.get_nowait()
+                    except queue.Empty:
+                        return
+                    if speed:
+                        delay = started_at + offset / speed - time.time()
+                        if delay > 0:
+                            time.sleep(delay)
+                    request_start = time.time()
+                    try:
+                        status, query_count = replayer.send(entry)
+                    except Exception as e:
+                        status, query_count = repr(e), None
+                    latency = time.time() - request_start
+                    with results_lock:
+                        results.append((get_endpoint_name(entry), status, latency, query_count))
+            finally:
+                replayer.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return results, time.time() - started_at
+
+    def report(self, results, elapsed, counts_queries):
+        by_endpoint = OrderedDict()
+        for endpoint, status, latency, query_count in sorted(results, key=lambda result: result[0]):
+            by_endpoint.setdefault(endpoint, []).append((status, latency, query_count))
+
+        header = "{:<45} {:>6} {:>6} {:>9} {:>9} {:>9} {:>9} {:>8}".format(
+            "endpoint", "reqs", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms", "queries")
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+
+        statuses = defaultdict(int)
+        for endpoint, rows in by_endpoint.items():
+            latencies = sorted(latency for _, latency, _ in rows)
+            errors = 0
+            for status, _, _ in rows:
+                statuses[status] += 1
+                if not isinstance(status, int) or status >= 400:
+                    errors += 1
+            if counts_queries:
+                queries = "{:.1f}".format(sum(count for _, _, count in rows if count is not None) / float(len(rows)))
+            else:
+                queries = "-"
+            self.stdout.write("{:<45} {:>6} {:>6} {:>9.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>8}".format(
+                endpoint[:45],
+                len(rows),
+                errors,
+                len(rows) / elapsed,
+                percentile(latencies, 50) * 1000,
+                percentile(latencies, 95) * 1000,
+                percentile(latencies, 99) * 1000,
+                queries,
+            ))
+
+        all_latencies = sorted(latency for _, _, latency, _ in results)
+        self.stdout.write("-" * len(header))
+        self.stdout.write("{} requests in {:.2f}s: {:.1f} req/s, p50 {:.2f}ms, p95 {:.2f}ms, p99 {:.2f}ms".format(
+            len(results),
+            elapsed,
+            len(results) / elapsed,
+            percentile(all_latencies, 50) * 1000,
+            percentile(all_latencies, 95) * 1000,
+            percentile(all_latencies, 99) * 1000,
+        ))
+        self.stdout.write("status codes: {}".format(
+            ", ".join("{}: {}".format(status, count) for status, count in sorted(statuses.items(), key=str))
+        ))
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductFragment',
+            fields=[
+                ('product_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='Product')),
+                ('content', models.BinaryField(verbose_name='Rendered JSON')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='Update Date')),
+            ],
+        ),
+    ]
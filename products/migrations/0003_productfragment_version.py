@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_productfragment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productfragment',
+            name='version',
+            field=models.CharField(default='', max_length=32, verbose_name='Serializer and renderer version'),
+            preserve_default=False,
+        ),
+    ]
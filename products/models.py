@@ -16,3 +16,15 @@ class Product(models.Model):
 
     def __unicode__(self):
         return self.name
+
+
+class ProductFragment(models.Model):
+    """
+    The JSON of a product as rendered in the API (see products.fragments),
+    kept up to date by the products save and delete signals
+    """
+
+    product_id = models.IntegerField(_("Product"), primary_key=True)
+    content = models.BinaryField(_("Rendered JSON"))
+    version = models.CharField(_("Serializer and renderer version"), max_length=32)
+    updated_date = models.DateTimeField(_("Update Date"), auto_now=True)
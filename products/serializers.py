@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from mystore.instrumentation import TimedSerializerMixin, TimedListSerializer
 from .models import Product
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         swagger_name = "Product"
@@ -10,3 +11,4 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ('id', 'name', 'description', 'price', 'color', 'created_date', 'in_stock')
         read_only = ('id',)
+        list_serializer_class = TimedListSerializer
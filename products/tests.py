@@ -1,3 +1,99 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+import msgpack
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from .models import Product
+
+
+class OfflineGenerationTests(SimpleTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_offline_document(self):
+        """
+        The offline document of the project urlconf (admin.site.urls included) documents the products
+        """
+        output = os.path.join(self.directory, 'swagger.json')
+        call_command('generate_swagger', offline=True, output=output, verbosity=0)
+        with open(output) as document_file:
+            document = json.load(document_file)
+        paths = [path for path in document['paths'] if 'products' in path]
+        self.assertEqual(len(paths), 2)
+        self.assertIn('post', document['paths'][min(paths, key=len)])
+
+    def test_offline_classes(self):
+        """
+        The product views and serializer are rebuilt from their sources, not imported
+        """
+        from rest_framework_swagger.offline import OfflineBuilder, get_offline_url_index
+        from .serializers import ProductSerializer
+
+        builder = OfflineBuilder()
+        get_offline_url_index(builder=builder)
+        self.assertEqual(builder.stats['static_views'], 2)
+        self.assertEqual(builder.stats['imported_views'], 0)
+        self.assertGreaterEqual(builder.stats['static_serializers'], 1)
+        self.assertEqual(builder.stats['imported_serializers'], 0)
+        self.assertIsNot(builder.classes['products.serializers.ProductSerializer'], ProductSerializer)
+
+
+PRODUCT_PAYLOAD = {
+    'name': 'Lamp',
+    'description': 'A desk lamp',
+    'price': 24.9,
+    'color': 3,
+    'in_stock': True,
+}
+
+
+@override_settings(SCHEMA_VALIDATION_ENABLED=True)
+class SchemaValidationTests(APITestCase):
+
+    def test_rejected_payload(self):
+        """
+        An object given for a number is rejected with the message of the DRF field
+        """
+        response = self.client.post('/products', dict(PRODUCT_PAYLOAD, price={'a': 1}), format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'price': ['A valid number is required.']})
+        self.assertFalse(Product.objects.exists())
+
+    def test_accepted_payload(self):
+        """
+        What the serializer accepts goes through, i.e. an object for a string
+        """
+        response = self.client.post('/products', dict(PRODUCT_PAYLOAD, name={'a': 1}), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get().name, "{'a': 1}")
+
+
+class MessagePackTests(APITestCase):
+
+    def test_round_trip(self):
+        """
+        A MessagePack payload is parsed (Content-Type) and the response rendered (Accept) as MessagePack
+        """
+        response = self.client.post(
+            '/products', msgpack.packb(PRODUCT_PAYLOAD, use_bin_type=True),
+            content_type='application/msgpack', HTTP_ACCEPT='application/msgpack',
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        product = msgpack.unpackb(response.content, raw=False)
+        self.assertEqual(product['name'], PRODUCT_PAYLOAD['name'])
+        self.assertEqual(product['id'], Product.objects.get().pk)
+
+    def test_malformed_payload(self):
+        """
+        A map with an array key is a parse error
+        """
+        response = self.client.post('/products', msgpack.packb({(1, 2): 1}), content_type='application/msgpack')
+        self.assertEqual(response.status_code, 400)
@@ -1,12 +1,23 @@
 from rest_framework import generics
+from rest_framework.settings import api_settings
+from mystore.parsers import MessagePackParser
+from mystore.renderers import MessagePackRenderer
+from mystore.validation import SchemaValidationMixin
+from . import fragments
 from .models import Product
 from .serializers import ProductSerializer
 
+# JSON by default, MessagePack for the clients asking (Accept) or sending (Content-Type) it
+PRODUCT_RENDERER_CLASSES = tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (MessagePackRenderer,)
+PRODUCT_PARSER_CLASSES = tuple(api_settings.DEFAULT_PARSER_CLASSES) + (MessagePackParser,)
 
-class ProductListCreateView(generics.ListCreateAPIView):
+
+class ProductListCreateView(SchemaValidationMixin, generics.ListCreateAPIView):
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    renderer_classes = PRODUCT_RENDERER_CLASSES
+    parser_classes = PRODUCT_PARSER_CLASSES
 
     def list(self, *args, **kwargs):
         """
@@ -16,6 +27,8 @@ class ProductListCreateView(generics.ListCreateAPIView):
                 - Product
             operationId: listProducts
         """
+        if fragments.is_enabled() and fragments.can_render(self.request):
+            return fragments.get_list_response(self, self.filter_queryset(self.get_queryset()))
         return super(ProductListCreateView, self).list(*args, **kwargs)
 
     def create(self, *args, **kwargs):
@@ -29,10 +42,12 @@ class ProductListCreateView(generics.ListCreateAPIView):
         return super(ProductListCreateView, self).create(*args, **kwargs)
 
 
-class ProductRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
+class ProductRetrieveUpdateDestroyView(SchemaValidationMixin, generics.RetrieveUpdateDestroyAPIView):
 
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
+    renderer_classes = PRODUCT_RENDERER_CLASSES
+    parser_classes = PRODUCT_PARSER_CLASSES
     pagination_class = None
     lookup_url_kwarg = "product_id"
 
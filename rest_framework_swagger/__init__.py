@@ -1,5 +1,7 @@
 VERSION = '0.3.2'
 
+default_app_config = 'rest_framework_swagger.apps.RestFrameworkSwaggerConfig'
+
 DEFAULT_SWAGGER_SETTINGS = {
     'exclude_namespaces': [],
     'api_version': '',
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from django.apps import AppConfig
+from django.conf import settings
+
+from .config import compile_configs
+
+
+class RestFrameworkSwaggerConfig(AppConfig):
+    name = 'rest_framework_swagger'
+
+    def ready(self):
+        """
+        The swagger configs are compiled when the process starts.
+
+        SWAGGER_WARMUP generates the swagger documents when the process starts:
+         - 'background': in a background thread, requests are served meanwhile
+         - 'blocking': before the process is ready to serve any request
+        """
+        compile_configs()
+
+        warmup = getattr(settings, 'SWAGGER_WARMUP', None)
+        if not warmup:
+            return
+
+        from .documents import warm_up
+        if warmup == 'blocking':
+            warm_up()
+        else:
+            thread = threading.Thread(target=warm_up, name='swagger-warmup')
+            thread.daemon = True
+            thread.start()
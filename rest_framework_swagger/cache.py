@@ -0,0 +1,505 @@
+# -*- coding: utf-8 -*-
+"""
+Cache of the generated (and encoded) swagger documents.
+
+Documents are kept in a per process LRU. When SWAGGER_CACHE configures a
+shared backend the full documents (not their slices) are also stored there,
+so a document is generated by a single worker and loaded by the others:
+
+    SWAGGER_CACHE = {
+        # or 'rest_framework_swagger.cache.DjangoCacheBackend'
+        'BACKEND': 'rest_framework_swagger.cache.FileBackend',
+        # a directory private to the user running the app
+        'OPTIONS': {'directory': '/var/cache/mystore/swagger', 'max_entries': 64},
+        # seconds a worker waits for the document another one is building
+        'WAIT': 10,
+        # documents are considered stale after MAX_AGE seconds (or when invalidated)
+        'MAX_AGE': 3600,
+        # serve stale documents while they are rebuilt in the background
+        'STALE_WHILE_REVALIDATE': True,
+    }
+
+Shared entries are versioned with the swagger settings, the urlconf, the
+sources of the documented modules (see get_code_fingerprint) and
+SWAGGER_CACHE_VERSION (i.e. the deployed commit): while a worker builds the
+document of a new version, the others serve the previous version.
+"""
+import hashlib
+import inspect
+import json
+import logging
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test.signals import setting_changed
+
+from . import VERSION
+from .compat import OrderedDict, import_string
+from .encoding import EncodedDocument
+
+logger = logging.getLogger(__name__)
+
+# settings that change the generated documents
+INVALIDATING_SETTINGS = (
+    'ROOT_URLCONF',
+    'REST_FRAMEWORK',
+    'SWAGGER_CACHE',
+    'SWAGGER_CACHE_MAX_ENTRIES',
+    'SWAGGER_CACHE_VERSION',
+    'SWAGGER_GLOBAL_SETTINGS',
+    'SWAGGER_LOCAL_SETTINGS',
+)
+
+DEFAULT_MAX_ENTRIES = 128
+DEFAULT_MAX_FILES = 64
+DEFAULT_WAIT = 10
+DEFAULT_LOCK_TIMEOUT = 300
+
+# key => CacheEntry, least recently used first
+_documents = OrderedDict()
+_lock = threading.Lock()
+_state = {}
+# keys being rebuilt in the background
+_revalidating = set()
+_stats = dict.fromkeys((
+    'hits',
+    'misses',
+    'stale_hits',
+    'rebuilds',
+    'rebuild_failures',
+), 0)
+_stats.update(dict.fromkeys((
+    'rebuild_seconds_total',
+    'last_rebuild_seconds',
+    'last_staleness_seconds',
+    'max_staleness_seconds',
+), 0.0))
+
+
+class DjangoCacheBackend(object):
+    """
+    Stores the documents in one of the django caches (memcached, redis, database...)
+    """
+
+    def __init__(self, alias='default', timeout=None, lock_timeout=DEFAULT_LOCK_TIMEOUT):
+        from django.core.cache import caches
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.lock_timeout = lock_timeout
+
+    def get(self, key):
+        return self.cache.get(key)
+
+    def set(self, key, document):
+        self.cache.set(key, document, self.timeout)
+
+    def acquire(self, key):
+        return self.cache.add(key + ':lock', os.getpid(), self.lock_timeout)
+
+    def release(self, key):
+        self.cache.delete(key + ':lock')
+
+
+class FileBackend(object):
+    """
+    Stores the documents in files, for the workers of a same host.
+    Files are replaced atomically and the build lock is a flock (released
+    by the system if the building worker dies). The directory must only be
+    writable by the user running the app, and only the max_entries most
+    recently written documents are kept.
+    """
+
+    def __init__(self, directory=None, max_entries=DEFAULT_MAX_FILES):
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), 'swagger-cache-{}'.format(os.getuid()))
+        self.max_entries = max_entries
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory, 0o700)
+            except OSError:
+                # created by another worker meanwhile
+                if not os.path.isdir(self.directory):
+                    raise
+        self.check_directory()
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+
+    def check_directory(self):
+        directory_stat = os.stat(self.directory)
+        if directory_stat.st_uid != os.getuid() or directory_stat.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            raise ImproperlyConfigured(
+                "the swagger cache directory {} must belong to the app user and not be writable "
+                "by the others".format(self.directory))
+
+    def get_path(self, key, extension='.bin'):
+        return os.path.join(self.directory, key.replace(':', '-') + extension)
+
+    def get(self, key):
+        try:
+            with open(self.get_path(key), 'rb') as document_file:
+                return EncodedDocument.loads(document_file.read())
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, key, document):
+        path = self.get_path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as tmp_file:
+                tmp_file.write(document.dumps())
+            os.rename(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """
+        Removes the least recently written documents (and their locks) above max_entries
+        """
+        paths = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.bin'):
+                path = os.path.join(self.directory, name)
+                try:
+                    paths.append((os.path.getmtime(path), path))
+                except OSError:
+                    # evicted by another worker meanwhile
+                    continue
+        paths.sort()
+        for _, path in paths[:max(0, len(paths) - self.max_entries)]:
+            for evicted_path in (path, path[:-len('.bin')] + '.lock'):
+                try:
+                    os.unlink(evicted_path)
+                except OSError:
+                    pass
+
+    def acquire(self, key):
+        import fcntl
+        lock_file = open(self.get_path(key, '.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except (IOError, OSError):
+            lock_file.close()
+            return False
+        with self.locks_lock:
+            self.locks[key] = lock_file
+        return True
+
+    def release(self, key):
+        import fcntl
+        with self.locks_lock:
+            lock_file = self.locks.pop(key, None)
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+
+def get_cache_settings():
+    return getattr(settings, 'SWAGGER_CACHE', None) or {}
+
+
+def get_backend():
+    """
+    Returns the configured shared backend (None if documents are per process)
+    """
+    if 'backend' not in _state:
+        cache_settings = get_cache_settings()
+        backend = None
+        if cache_settings.get('BACKEND'):
+            backend = import_string(cache_settings['BACKEND'])(**cache_settings.get('OPTIONS', {}))
+        _state['backend'] = backend
+    return _state['backend']
+
+
+def get_source_modules():
+    """
+    Returns the names of the modules the documents are generated from: the
+    urlconfs, the views (and their bases) and their serializers (and their bases)
+    """
+    from .urlparser import get_url_index
+
+    modules = set([settings.ROOT_URLCONF])
+    for endpoint in get_url_index(settings.ROOT_URLCONF).endpoints:
+        modules.update(endpoint['modules'])
+        classes = [endpoint['callback']]
+        serializer_class = getattr(endpoint['callback'], 'serializer_class', None)
+        if inspect.isclass(serializer_class):
+            classes.append(serializer_class)
+        for cls in classes:
+            if inspect.isclass(cls):
+                modules.update(base.__module__ for base in inspect.getmro(cls))
+    return sorted(module for module in modules if module)
+
+
+def get_code_fingerprint():
+    """
+    Returns the (module, mtime, size) of the sources of the documented modules,
+    so an edited docstring or serializer changes the build version
+    """
+    fingerprint = []
+    for module_name in get_source_modules():
+        path = getattr(sys.modules.get(module_name), '__file__', None)
+        if not path:
+            continue
+        if path.endswith(('.pyc', '.pyo')):
+            path = path[:-1]
+        try:
+            source_stat = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((module_name, source_stat.st_mtime, source_stat.st_size))
+    return fingerprint
+
+
+def get_build_version():
+    """
+    Fingerprint of everything the documents depend on: the swagger settings,
+    the urlconf, the sources of the documented modules and SWAGGER_CACHE_VERSION
+    """
+    if 'version' not in _state:
+        fingerprint = json.dumps([
+            VERSION,
+            getattr(settings, 'SWAGGER_CACHE_VERSION', ''),
+            settings.ROOT_URLCONF,
+            getattr(settings, 'SWAGGER_GLOBAL_SETTINGS', {}),
+            getattr(settings, 'SWAGGER_LOCAL_SETTINGS', {}),
+            get_code_fingerprint(),
+        ], sort_keys=True, default=repr)
+        _state['version'] = hashlib.md5(fingerprint.encode('utf-8')).hexdigest()
+    return _state['version']
+
+
+def get_storage_key(key, versioned=True):
+    key_hash = hashlib.md5(repr(key).encode('utf-8')).hexdigest()
+    if not versioned:
+        return 'swagger:latest:{}'.format(key_hash)
+    return 'swagger:{}:{}'.format(get_build_version(), key_hash)
+
+
+class CacheEntry(object):
+    """
+    A document of the per process cache
+    """
+
+    def __init__(self, document):
+        self.document = document
+        # documents loaded from the shared backend may have been built earlier
+        self.built_at = getattr(document, 'built_at', None) or time.time()
+        # set by invalidate()
+        self.invalidated_at = None
+
+    def get_stale_since(self, max_age):
+        """
+        Returns when the entry became stale (None if it's still fresh)
+        """
+        if self.invalidated_at is not None:
+            return self.invalidated_at
+        if max_age is not None and time.time() - self.built_at > max_age:
+            return self.built_at + max_age
+        return None
+
+    def get_min_built_at(self, max_age):
+        """
+        Returns when the replacement of the (stale) entry must have been built, at the earliest
+        """
+        min_built_at = self.invalidated_at or 0.0
+        if max_age is not None:
+            min_built_at = max(min_built_at, time.time() - max_age)
+        return min_built_at
+
+
+def get_or_build(key, build, shared=True):
+    """
+    Returns the document cached under key, calling build() to create it if missing.
+    Only the SWAGGER_CACHE_MAX_ENTRIES most recently used documents are kept by each process,
+    and only the shared ones are stored in the shared backend.
+
+    Documents older than SWAGGER_CACHE['MAX_AGE'] seconds, or invalidated, are
+    stale: they are rebuilt before being served, unless SWAGGER_CACHE['STALE_WHILE_REVALIDATE']
+    is set, in which case the stale document is served while a background
+    thread rebuilds it.
+    """
+    cache_settings = get_cache_settings()
+    with _lock:
+        entry = _documents.pop(key, None)
+        if entry is not None:
+            _documents[key] = entry
+
+    if entry is not None:
+        stale_since = entry.get_stale_since(cache_settings.get('MAX_AGE'))
+        if stale_since is None:
+            _stats['hits'] += 1
+            return entry.document
+        if cache_settings.get('STALE_WHILE_REVALIDATE'):
+            _stats['stale_hits'] += 1
+            staleness = time.time() - stale_since
+            _stats['last_staleness_seconds'] = staleness
+            _stats['max_staleness_seconds'] = max(_stats['max_staleness_seconds'], staleness)
+            revalidate(key, build, entry.get_min_built_at(cache_settings.get('MAX_AGE')), shared)
+            return entry.document
+        return rebuild(key, build, entry.get_min_built_at(cache_settings.get('MAX_AGE')), shared)
+
+    _stats['misses'] += 1
+    return rebuild(key, build, shared=shared)
+
+
+def load(key, build, min_built_at=None, shared=True):
+    """
+    Returns (document, is_current), from the shared backend if any (and shared)
+    """
+    backend = get_backend()
+    if backend is None or not shared:
+        return build(), True
+    return get_or_build_shared(backend, key, build, min_built_at)
+
+
+def rebuild(key, build, min_built_at=None, shared=True):
+    """
+    Loads the document and swaps it in the per process cache, a stale entry
+    is rebuilt unless another worker stored a document built since min_built_at
+    """
+    started = time.time()
+    document, is_current = load(key, build, min_built_at, shared)
+    if min_built_at is not None:
+        duration = time.time() - started
+        _stats['rebuilds'] += 1
+        _stats['rebuild_seconds_total'] += duration
+        _stats['last_rebuild_seconds'] = duration
+
+    # a previous version is served while another worker builds the current
+    # one, it must not stick in this process
+    if is_current:
+        max_entries = getattr(settings, 'SWAGGER_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)
+        with _lock:
+            _documents.pop(key, None)
+            _documents[key] = CacheEntry(document)
+            while len(_documents) > max_entries:
+                _documents.popitem(last=False)
+    return document
+
+
+def revalidate(key, build, min_built_at, shared=True):
+    """
+    Rebuilds the document in a background thread (once at a time per key)
+    """
+    with _lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            rebuild(key, build, min_built_at, shared)
+        except Exception:
+            _stats['rebuild_failures'] += 1
+            logger.exception("could not rebuild the swagger document %r", key)
+        finally:
+            with _lock:
+                _revalidating.discard(key)
+
+    thread = threading.Thread(target=run, name='swagger-revalidate')
+    thread.daemon = True
+    thread.start()
+
+
+def invalidate(key=None):
+    """
+    Marks the document cached under key (all the documents if None) as stale
+    """
+    now = time.time()
+    with _lock:
+        entries = list(_documents.values()) if key is None else [_documents.get(key)]
+        for entry in entries:
+            if entry is not None and entry.invalidated_at is None:
+                entry.invalidated_at = now
+
+
+def get_stats():
+    return dict(_stats)
+
+
+def get_metrics():
+    """
+    The cache statistics as (name, type, description, value) metrics
+    """
+    return [
+        ('swagger_cache_hits', 'counter', "Fresh documents served from the cache", _stats['hits']),
+        ('swagger_cache_misses', 'counter', "Documents built because they were not cached", _stats['misses']),
+        ('swagger_cache_stale_hits', 'counter', "Stale documents served while being rebuilt", _stats['stale_hits']),
+        ('swagger_cache_rebuilds', 'counter', "Rebuilds of stale documents", _stats['rebuilds']),
+        ('swagger_cache_rebuild_failures', 'counter', "Failed background rebuilds", _stats['rebuild_failures']),
+        ('swagger_cache_rebuild_seconds_total', 'counter', "Time spent rebuilding stale documents",
+         _stats['rebuild_seconds_total']),
+        ('swagger_cache_last_rebuild_seconds', 'gauge', "Duration of the last rebuild",
+         _stats['last_rebuild_seconds']),
+        ('swagger_cache_last_staleness_seconds', 'gauge', "Age of the last stale document served",
+         _stats['last_staleness_seconds']),
+        ('swagger_cache_max_staleness_seconds', 'gauge', "Maximum age of the stale documents served",
+         _stats['max_staleness_seconds']),
+    ]
+
+
+def is_fresh(document, min_built_at):
+    return document is not None and (min_built_at is None or document.built_at >= min_built_at)
+
+
+def get_or_build_shared(backend, key, build, min_built_at=None):
+    """
+    Returns (document, is_current) from the shared backend, building it
+    if this worker gets the build lock. A stored document built before
+    min_built_at (i.e. the stale one being rebuilt) is built again, once for
+    all the workers.
+    """
+    storage_key = get_storage_key(key)
+    latest_key = get_storage_key(key, versioned=False)
+
+    document = backend.get(storage_key)
+    if is_fresh(document, min_built_at):
+        return document, True
+
+    if backend.acquire(storage_key):
+        try:
+            document = backend.get(storage_key)
+            if not is_fresh(document, min_built_at):
+                document = build()
+                backend.set(storage_key, document)
+                backend.set(latest_key, document)
+        finally:
+            backend.release(storage_key)
+        return document, True
+
+    # another worker is building it, serve the previous version meanwhile
+    previous = backend.get(latest_key)
+    if previous is not None:
+        return previous, False
+
+    deadline = time.time() + get_cache_settings().get('WAIT', DEFAULT_WAIT)
+    while time.time() < deadline:
+        time.sleep(0.05)
+        document = backend.get(storage_key)
+        if is_fresh(document, min_built_at):
+            return document, True
+
+    logger.warning("gave up waiting for the swagger document %s, building it", storage_key)
+    return build(), True
+
+
+def clear():
+    with _lock:
+        _documents.clear()
+        _state.clear()
+
+
+def clear_on_setting_changed(*args, **kwargs):
+    if kwargs['setting'] in INVALIDATING_SETTINGS:
+        clear()
+
+
+setting_changed.connect(clear_on_setting_changed)
@@ -1,5 +1,15 @@
 # -*- coding: utf-8 -*-
+import re
+import threading
+from importlib import import_module
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
 from django.conf import settings
+from django.test.signals import setting_changed
 
 
 class SwaggerConfig(object):
@@ -11,18 +21,113 @@ class SwaggerConfig(object):
         'include_module_paths': [],
         'requires_authentication': False,
         'requires_superuser': False,
-        'base_path': ''
+        'base_path': '',
+        # stream the document (uncached) instead of rendering it at once
+        'stream': False,
+        # hoist the repeated schemas and parameters into definitions/parameters
+        # (not applied to streamed documents)
+        'dedupe': False,
     }
 
-    def __init__(self):
-        super(SwaggerConfig, self).__init__()
-        self.global_settings = self.DEFAULT_SWAGGER_SETTINGS.copy()
-        self.global_settings.update(settings.SWAGGER_GLOBAL_SETTINGS)
-
     def get_config(self, config_name=None):
-        config_name = config_name or "default"
-        if config_name not in settings.SWAGGER_LOCAL_SETTINGS:
-            raise Exception("{} swagger settings not defined".format(config_name))
-        current_config = self.global_settings.copy()
-        current_config.update(settings.SWAGGER_LOCAL_SETTINGS[config_name])
-        return current_config
+        return get_config(config_name)
+
+
+class CompiledConfig(Mapping):
+    """
+    A swagger config, read only: its settings (the global ones merged with the
+    local ones) plus the compiled url filters and the resolved global
+    parameters of global_parametters_docs.
+    """
+
+    def __init__(self, name, config_settings):
+        self.name = name
+        self._settings = dict(config_settings)
+
+        self.exclude_namespaces = frozenset(self.get('exclude_namespaces', []))
+        self.exclude_module_paths = frozenset(self.get('exclude_module_paths', []))
+        self.include_module_paths = frozenset(self.get('include_module_paths', []))
+        self.exclude_url_patterns = tuple(self.get('exclude_url_patterns', []))
+        self.exclude_url_patterns_names = frozenset(self.get('exclude_url_patterns_names', []))
+        # the excluded url fragments, all checked in one search
+        self.exclude_url_regex = None
+        if self.exclude_url_patterns:
+            self.exclude_url_regex = re.compile('|'.join(re.escape(excluded) for excluded in self.exclude_url_patterns))
+        # what the endpoints are filtered on (see UrlParser)
+        self.filter_key = (
+            self.exclude_namespaces,
+            self.exclude_module_paths,
+            self.include_module_paths,
+            self.exclude_url_patterns,
+            self.exclude_url_patterns_names,
+        )
+
+        self.global_parameters = {}
+        if self.get('global_parametters_docs'):
+            params_module = import_module(self['global_parametters_docs'])
+            self.global_parameters = getattr(params_module, 'GLOBAL_PARAMETERS')
+
+    def __getitem__(self, key):
+        return self._settings[key]
+
+    def __iter__(self):
+        return iter(self._settings)
+
+    def __len__(self):
+        return len(self._settings)
+
+    def __repr__(self):
+        return '<CompiledConfig {}>'.format(self.name)
+
+    def replace(self, **changes):
+        """
+        Returns a copy of the config with some settings changed
+        """
+        config_settings = dict(self._settings)
+        config_settings.update(changes)
+        return CompiledConfig(self.name, config_settings)
+
+
+# config name => CompiledConfig
+_configs = {}
+_configs_lock = threading.Lock()
+
+
+def build_config(config_name):
+    if config_name not in settings.SWAGGER_LOCAL_SETTINGS:
+        raise Exception("{} swagger settings not defined".format(config_name))
+    config_settings = SwaggerConfig.DEFAULT_SWAGGER_SETTINGS.copy()
+    config_settings.update(settings.SWAGGER_GLOBAL_SETTINGS)
+    config_settings.update(settings.SWAGGER_LOCAL_SETTINGS[config_name])
+    return CompiledConfig(config_name, config_settings)
+
+
+def get_config(config_name=None):
+    """
+    Returns the CompiledConfig of a config name (the default one if None),
+    compiled once until the swagger settings change
+    """
+    config_name = config_name or "default"
+    config = _configs.get(config_name)
+    if config is None:
+        config = build_config(config_name)
+        with _configs_lock:
+            _configs[config_name] = config
+    return config
+
+
+def compile_configs():
+    """
+    Compiles all the configs of SWAGGER_LOCAL_SETTINGS
+    """
+    for config_name in settings.SWAGGER_LOCAL_SETTINGS:
+        get_config(config_name)
+
+
+def clear_configs(*args, **kwargs):
+    if kwargs.get('setting') in (None, 'SWAGGER_GLOBAL_SETTINGS', 'SWAGGER_LOCAL_SETTINGS'):
+        with _configs_lock:
+            _configs.clear()
+
+
+setting_changed.connect(clear_configs)
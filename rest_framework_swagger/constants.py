@@ -11,3 +11,14 @@ INTROSPECTOR_PRIMITIVES = {
     'string': ['string', 'byte', 'date', 'date-time'],
     'boolean': ['boolean'],
 }
+
+# the methods documented with a consumes list
+BODY_METHODS = frozenset(('POST', 'PUT', 'PATCH'))
+# media types of the renderers left out of the produces lists (i.e. the browsable API)
+UNDOCUMENTED_MEDIA_TYPES = frozenset(('text/html',))
+
+# all the formats of INTROSPECTOR_PRIMITIVES
+INTROSPECTOR_FORMATS = frozenset(
+    data_format for formats in INTROSPECTOR_PRIMITIVES.values()
+    for data_format in formats
+)
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Hoists the schemas and the parameters repeated by the operations of a swagger
+document (i.e. the pagination envelopes) into its definitions and parameters,
+replacing each occurrence with a $ref.
+"""
+import hashlib
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .compat import OrderedDict
+from .diff import HTTP_METHODS
+
+
+def get_fingerprint(obj):
+    return json.dumps(obj, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+
+
+def is_object_schema(schema):
+    return isinstance(schema, dict) and 'properties' in schema and '$ref' not in schema
+
+
+def get_schema_name(schema, fingerprint):
+    items = schema['properties'].get('results', {}).get('items', {})
+    if '$ref' in items:
+        # pagination envelope
+        return 'Paginated' + items['$ref'].rsplit('/', 1)[-1]
+    return 'Schema' + hashlib.md5(fingerprint.encode('utf-8')).hexdigest()[:8]
+
+
+def get_parameter_name(parameter, fingerprint):
+    return '{}_{}'.format(parameter.get('in', ''), parameter.get('name', ''))
+
+
+def iter_operations(document):
+    for path, path_item in (document.get('paths') or {}).items():
+        for method in sorted(path_item):
+            if method in HTTP_METHODS:
+                yield path_item[method]
+
+
+def get_schema_slots(document):
+    """
+    Returns the (container, key) of the object schemas of the responses and body parameters
+    """
+    slots = []
+    for operation in iter_operations(document):
+        for parameter in operation.get('parameters') or []:
+            if is_object_schema(parameter.get('schema')):
+                slots.append((parameter, 'schema'))
+        for response in (operation.get('responses') or {}).values():
+            if isinstance(response, dict) and is_object_schema(response.get('schema')):
+                slots.append((response, 'schema'))
+    return slots
+
+
+def get_parameter_slots(document):
+    """
+    Returns the (list, index) of the path and operations parameters
+    """
+    slots = []
+    parameter_lists = [path_item.get('parameters') for path_item in (document.get('paths') or {}).values()]
+    parameter_lists.extend(operation.get('parameters') for operation in iter_operations(document))
+    for parameters in parameter_lists:
+        for index, parameter in enumerate(parameters or []):
+            if isinstance(parameter, dict) and '$ref' not in parameter:
+                slots.append((parameters, index))
+    return slots
+
+
+def hoist(slots, section, ref_prefix, get_name, min_count):
+    """
+    Moves the objects found at least min_count times in the slots to section,
+    under a name given by get_name(obj, fingerprint), and references them
+    """
+    groups = {}
+    for container, key in slots:
+        groups.setdefault(get_fingerprint(container[key]), []).append((container, key))
+
+    fingerprints = dict((name, get_fingerprint(obj)) for name, obj in section.items())
+    named_groups = sorted(
+        (get_name(group[0][0][group[0][1]], fingerprint), fingerprint, group)
+        for fingerprint, group in groups.items() if len(group) >= min_count
+    )
+    for name, fingerprint, group in named_groups:
+        unique_name, suffix = name, 1
+        while unique_name in fingerprints and fingerprints[unique_name] != fingerprint:
+            suffix += 1
+            unique_name = '{}_{}'.format(name, suffix)
+        container, key = group[0]
+        section[unique_name] = container[key]
+        fingerprints[unique_name] = fingerprint
+        for container, key in group:
+            container[key] = {'$ref': ref_prefix + unique_name}
+
+
+def dedupe_document(document, min_count=2):
+    """
+    Hoists the schemas and the parameters found at least min_count times,
+    the document is modified in place and returned
+    """
+    definitions = document.get('definitions')
+    if definitions is None:
+        definitions = document['definitions'] = OrderedDict()
+    # schemas first: body parameters only differing by their schema become identical
+    hoist(get_schema_slots(document), definitions, '#/definitions/', get_schema_name, min_count)
+
+    parameters = document.get('parameters') or OrderedDict()
+    hoist(get_parameter_slots(document), parameters, '#/parameters/', get_parameter_name, min_count)
+
+    # keep the sections sorted, as generated
+    document['definitions'] = OrderedDict(sorted(definitions.items()))
+    if parameters:
+        document['parameters'] = OrderedDict(sorted(parameters.items()))
+    return document
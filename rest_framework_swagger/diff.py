@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Structural comparison of two swagger documents."""
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .compat import OrderedDict
+
+HTTP_METHODS = ('get', 'put', 'post', 'delete', 'options', 'head', 'patch')
+
+
+def normalize(document):
+    """
+    Returns the document as loaded from its JSON, so a generated document
+    compares equal to its dumped artifact
+    """
+    return json.loads(json.dumps(document, cls=JSONEncoder))
+
+
+def get_operations(document):
+    """
+    Returns {(METHOD, path): operation}, the path parameters are part of each operation
+    """
+    operations = {}
+    for path, path_item in (document.get('paths') or {}).items():
+        for method, operation in path_item.items():
+            if method not in HTTP_METHODS:
+                continue
+            operation = dict(operation)
+            if path_item.get('parameters'):
+                operation['pathParameters'] = path_item['parameters']
+            operations[(method.upper(), path)] = operation
+    return operations
+
+
+def diff_mappings(old, new):
+    """
+    Returns the (added, removed, changed) keys of two dicts, sorted
+    """
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    changed = sorted(key for key in set(old) & set(new) if old[key] != new[key])
+    return added, removed, changed
+
+
+class DocumentDiff(object):
+    """
+    The operations, definitions and other root fields that differ between two documents
+    """
+
+    def __init__(self, old, new):
+        old, new = normalize(old), normalize(new)
+        self.operations = diff_mappings(get_operations(old), get_operations(new))
+        self.definitions = diff_mappings(old.get('definitions') or {}, new.get('definitions') or {})
+        root_fields = set(old) | set(new)
+        root_fields.difference_update(('paths', 'definitions'))
+        self.fields = sorted(field for field in root_fields if old.get(field) != new.get(field))
+
+    def has_changes(self):
+        return bool(self.fields or any(self.operations) or any(self.definitions))
+
+    def get_report(self):
+        """
+        Returns the changes as lines of text
+        """
+        lines = []
+        sections = OrderedDict((
+            ('operations', [[' '.join(operation) for operation in keys] for keys in self.operations]),
+            ('definitions', self.definitions),
+        ))
+        for section, (added, removed, changed) in sections.items():
+            for label, names in (('added', added), ('removed', removed), ('changed', changed)):
+                for name in names:
+                    lines.append('{} {}: {}'.format(label, section[:-1], name))
+        for field in self.fields:
+            lines.append('changed {}'.format(field))
+        return lines
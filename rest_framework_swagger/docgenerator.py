@@ -1,6 +1,12 @@
 """Generates API documentation by introspection."""
-from importlib import import_module
+import copy
+import inspect
+import multiprocessing
+import threading
+from multiprocessing.pool import ThreadPool
 from django.contrib.auth.models import AnonymousUser
+from django.test.signals import setting_changed
+from django.utils import six
 import rest_framework
 
 from rest_framework import viewsets, mixins
@@ -17,54 +23,250 @@ from .introspectors import (
     get_data_type,
 )
 from .compat import OrderedDict
-from .utils import extract_base_path, get_serializer_name, get_default_value
+from .utils import extract_base_path, get_serializer_name, get_default_value, get_user_fingerprint
+
+
+# (generator, method name, items) mapped by the process pool workers, see DocumentationGenerator.map
+_pool_state = None
+
+# user fingerprint => {endpoint key: IntrospectedEndpoint}, least recently used first
+_introspected_endpoints = OrderedDict()
+_introspected_endpoints_lock = threading.Lock()
+# user fingerprints whose introspections are kept: anonymous, superuser, staff
+# and authenticated users, times a few distinct groups sets
+MAX_INTROSPECTED_USERS = 8
+# endpoints introspections kept for all the fingerprints (the least recently
+# used fingerprints are dropped above it, never the current one)
+MAX_INTROSPECTED_ENDPOINTS = 2000
+
+
+def _call_pool_state(index):
+    generator, method_name, items = _pool_state
+    return getattr(generator, method_name)(items[index])
+
+
+class IntrospectedEndpoint(object):
+    """
+    What the introspection of an endpoint finds, whatever the swagger config:
+    shared by the configs and projected on each one by DocumentationGenerator.
+    """
+
+    def __init__(self, operations, path_parameters, method_serializers, depends_on_user=False):
+        # one dict per operation: 'config_name' (docstring swagger_config_name),
+        # 'tags', 'produces' and 'consumes' (from the docstring), 'view_produces'
+        # and 'view_consumes' (the media types of the view renderers and parsers),
+        # 'operation', 'responses' and 'explicit_serializers' (documented as body parameters)
+        self.operations = operations
+        self.path_parameters = path_parameters
+        # [(tags, serializers)] of each method (OPTIONS included)
+        self.method_serializers = method_serializers
+        # whether a view looked at the user to pick a serializer
+        self.depends_on_user = depends_on_user
+
+
+def get_introspected_endpoints(user_key):
+    """
+    Returns the {endpoint key: IntrospectedEndpoint} shared by the generators
+    of the users having the same fingerprint
+    """
+    with _introspected_endpoints_lock:
+        endpoints = _introspected_endpoints.pop(user_key, None)
+        if endpoints is None:
+            endpoints = {}
+        _introspected_endpoints[user_key] = endpoints
+        while len(_introspected_endpoints) > MAX_INTROSPECTED_USERS:
+            _introspected_endpoints.popitem(last=False)
+        total = sum(len(user_endpoints) for user_endpoints in _introspected_endpoints.values())
+        while total > MAX_INTROSPECTED_ENDPOINTS and len(_introspected_endpoints) > 1:
+            total -= len(_introspected_endpoints.popitem(last=False)[1])
+    return endpoints
+
+
+def copy_operation(operation):
+    """
+    Copies the parts of a shared operation that a document changes (see
+    DocumentationGenerator.get_operations and dedupe.hoist): the operation,
+    its parameters and its responses, not the schemas
+    """
+    operation = dict(operation)
+    if 'parameters' in operation:
+        operation['parameters'] = [dict(parameter) for parameter in operation['parameters']]
+    return operation
+
+
+def copy_responses(responses):
+    return dict(
+        (code, dict(response) if isinstance(response, dict) else response)
+        for code, response in responses.items()
+    )
+
+
+def clear_introspected_endpoints(*args, **kwargs):
+    if kwargs.get('setting') in (None, 'ROOT_URLCONF', 'REST_FRAMEWORK'):
+        with _introspected_endpoints_lock:
+            _introspected_endpoints.clear()
+
+
+setting_changed.connect(clear_introspected_endpoints)
 
 
 class DocumentationGenerator(object):
-    # Serializers defined in docstrings
-    explicit_serializers = set()
 
-    # Serializers defined in fields
-    fields_serializers = set()
-
-    # Response classes defined in docstrings
-    explicit_response_types = dict()
-
-    def __init__(self, for_user=None, config=None, request=None, config_name=None):
+    def __init__(self, for_user=None, config=None, request=None, config_name=None, tags=None, paths=None,
+                 workers=1, use_processes=False):
         self.config = config
         self.config_name = config_name
         self.user = for_user or AnonymousUser()
         self.request = request
+        # Serializers defined in docstrings
+        self.explicit_serializers = set()
+        # Serializers defined in fields
+        self.fields_serializers = set()
+        # Response classes defined in docstrings
+        self.explicit_response_types = dict()
+        # endpoints and definitions can be introspected by a pool of threads,
+        # or processes (for offline generation, requires the fork start method)
+        self.workers = workers
+        self.use_processes = use_processes
+        # optional slice of the document: only the operations having one of
+        # these tags and/or only these paths are generated
+        self.tags = set(tags or [])
+        self.paths = set(path.strip('/') for path in paths or [])
+        # streamed documents don't keep the introspections they make (only the
+        # serializers of each endpoint, for the definitions) so their memory
+        # doesn't grow with the API
+        self.share_introspections = True
+        self.endpoint_serializers = {}
+
+    def is_slice(self):
+        return bool(self.tags or self.paths)
 
     def get_root(self, endpoints_conf):
+        endpoints_conf = self.prepare_endpoints(endpoints_conf)
+        paths = self.get_paths(endpoints_conf)
+        definitions = self.get_definitions(endpoints_conf)
+        if self.is_slice():
+            definitions = self.get_referenced_definitions(paths, definitions)
+        return self.build_root(paths, definitions)
+
+    def iter_root(self, endpoints_conf):
+        """
+        Same document as get_root, but its 'paths' and 'definitions' are
+        generators of (name, item), so only one path item or definition is
+        built at once (see encoding.iter_json). Slices can't be streamed: they
+        need all their paths to find the referenced definitions.
+        """
+        assert not self.is_slice(), "document slices can't be streamed"
+        self.share_introspections = False
+        endpoints_conf = self.prepare_endpoints(endpoints_conf)
+        return self.build_root(self.iter_paths(endpoints_conf), self.iter_definitions(endpoints_conf))
+
+    def prepare_endpoints(self, endpoints_conf):
+        endpoints_conf = self.filter_endpoints(endpoints_conf)
         self.default_payload_definition_name = self.config.get("default_payload_definition_name", None)
         self.default_payload_definition = self.config.get("default_payload_definition", None)
         if self.default_payload_definition:
             self.explicit_response_types.update({
                 self.default_payload_definition_name: self.default_payload_definition
             })
-        return {
-            'swagger': '2.0',
-            'info': self.config.get('info', {
+        return endpoints_conf
+
+    def build_root(self, paths, definitions):
+        # paths come before the definitions, which use the serializers found in the paths
+        return OrderedDict((
+            ('swagger', '2.0'),
+            ('info', self.config.get('info', {
                 'contact': '',
-            }),
-            'basePath': self.config.get("basePath", '').format(
-                version=self.request.parser_context['kwargs'].get('version', '')
-            ),
-            'host': self.config.get('host', ''),
-            'schemes': self.config.get('schemes', ''),
-            'paths': self.get_paths(endpoints_conf),
-            'definitions': self.get_definitions(endpoints_conf),
-            'securityDefinitions': self.config.get('securityDefinitions', {}),
-            'security': self.config.get('security', []),
+            })),
+            ('basePath', self.config.get("basePath", '').format(
+                version=self.request.parser_context['kwargs'].get('version', '') if self.request else ''
+            )),
+            ('host', self.config.get('host', '')),
+            ('schemes', self.config.get('schemes', '')),
+            ('paths', paths),
+            ('definitions', definitions),
+            ('securityDefinitions', self.config.get('securityDefinitions', {})),
+            ('security', self.config.get('security', [])),
+        ))
+
+    def filter_endpoints(self, endpoints_conf):
+        """
+        Keeps only the endpoints of the requested paths (if any), so the others
+        are never introspected
+        """
+        if not self.paths:
+            return endpoints_conf
+        return [
+            endpoint for endpoint in endpoints_conf
+            if extract_base_path(path=endpoint['path'], base_path=self.config.get('basePath')).strip('/')
+            in self.paths
+        ]
+
+    def is_operation_included(self, tags):
+        """
+        Checks the operation tags against the requested ones (if any)
+        """
+        if not self.tags:
+            return True
+        return bool(self.tags.intersection(tags))
 
-        }
+    def get_referenced_definitions(self, paths, definitions):
+        """
+        Returns only the definitions (transitively) referenced from the paths
+        """
+        referenced = {}
+        pending = find_definition_refs(paths)
+        while pending:
+            name = pending.pop()
+            if name in referenced or name not in definitions:
+                continue
+            referenced[name] = definitions[name]
+            pending.update(find_definition_refs(definitions[name]))
+        return referenced
 
-    def get_paths(self, endpoints_conf):
-        paths_dict = {}
+    def map(self, method_name, items):
+        """
+        Returns [getattr(self, method_name)(item) for item in items], computed
+        by the workers pool if any. Results are always in the items order.
+        """
+        method = getattr(self, method_name)
+        if self.workers <= 1 or len(items) < 2:
+            return [method(item) for item in items]
+
+        if self.use_processes:
+            # forked workers inherit the generator and the items, only the
+            # indexes and the results go through pickle
+            global _pool_state
+            _pool_state = (self, method_name, items)
+            pool = multiprocessing.Pool(self.workers)
+            chunksize = max(1, len(items) // (self.workers * 4))
+            try:
+                return pool.map(_call_pool_state, range(len(items)), chunksize)
+            finally:
+                pool.close()
+                pool.join()
+                _pool_state = None
+
+        pool = ThreadPool(self.workers)
+        try:
+            return pool.map(method, items)
+        finally:
+            pool.close()
+            pool.join()
+
+    def strip_base_path(self, endpoints_conf):
         for endpoint in endpoints_conf:
             # remove the base_path from the begining of the path
             endpoint['path'] = extract_base_path(path=endpoint['path'], base_path=self.config.get('basePath'))
+
+    def get_paths(self, endpoints_conf):
+        self.strip_base_path(endpoints_conf)
+
+        self.introspect_endpoints(endpoints_conf)
+
+        paths_dict = {}
+        # merged in the endpoints order: for duplicated paths the last one wins
+        for endpoint in endpoints_conf:
             path_item = self.get_path_item(endpoint)
             if path_item:
                 paths_dict[endpoint['path']] = path_item
@@ -72,39 +274,160 @@ class DocumentationGenerator(object):
         paths_dict = OrderedDict(sorted(paths_dict.items()))
         return paths_dict
 
-    def get_path_item(self, api_endpoint):
+    def iter_paths(self, endpoints_conf):
+        """
+        Yields the (path, path item) of get_paths one at a time, in the same order
+        """
+        self.strip_base_path(endpoints_conf)
+
+        # the sort is stable: duplicated paths keep the endpoints order
+        endpoints_by_path = OrderedDict()
+        for endpoint in sorted(endpoints_conf, key=lambda endpoint: endpoint['path']):
+            endpoints_by_path.setdefault(endpoint['path'], []).append(endpoint)
+
+        for path, endpoints in endpoints_by_path.items():
+            path_item = None
+            for endpoint in endpoints:
+                endpoint_path_item = self.get_path_item(endpoint)
+                if endpoint_path_item:
+                    path_item = endpoint_path_item
+            if path_item:
+                yield path, path_item
+
+    def get_user_key(self):
+        return get_user_fingerprint(self.user)
+
+    def depends_on_user(self, endpoints_conf):
+        """
+        Whether the document could change with the user: only if a view looks
+        at the request user when it's asked for its serializer class
+        """
+        endpoints_conf = self.filter_endpoints(endpoints_conf)
+        self.strip_base_path(endpoints_conf)
+        self.introspect_endpoints(endpoints_conf)
+        return any(self.get_introspected_endpoint(endpoint).depends_on_user for endpoint in endpoints_conf)
+
+    def get_endpoint_key(self, endpoint):
+        return endpoint['callback'], endpoint['pattern'], endpoint['path']
+
+    def introspect_endpoints(self, endpoints_conf):
+        """
+        Introspects (with the workers pool if any) the endpoints that no
+        config introspected yet for this user (streamed documents introspect
+        each endpoint when they reach it instead)
+        """
+        if not self.share_introspections:
+            return
+        introspected = get_introspected_endpoints(self.get_user_key())
+        missing = OrderedDict()
+        for endpoint in endpoints_conf:
+            key = self.get_endpoint_key(endpoint)
+            if key not in introspected:
+                missing[key] = endpoint
+        for key, introspected_endpoint in zip(missing, self.map('introspect_endpoint', list(missing.values()))):
+            introspected[key] = introspected_endpoint
+
+    def get_introspected_endpoint(self, endpoint):
+        introspected = get_introspected_endpoints(self.get_user_key())
+        key = self.get_endpoint_key(endpoint)
+        introspected_endpoint = introspected.get(key)
+        if introspected_endpoint is None:
+            introspected_endpoint = self.introspect_endpoint(endpoint)
+            if self.share_introspections:
+                introspected[key] = introspected_endpoint
+            else:
+                self.endpoint_serializers[key] = introspected_endpoint.method_serializers
+        return introspected_endpoint
+
+    def introspect_endpoint(self, api_endpoint):
+        """
+        Returns the IntrospectedEndpoint of an endpoint (run by the workers
+        pool, so it doesn't depend on the config)
+        """
         introspector = self.get_introspector(api_endpoint)
+        method_introspectors = self.get_method_introspectors(api_endpoint, introspector)
+        operations = [
+            self.introspect_operation(method_introspector)
+            for method_introspector in method_introspectors
+        ]
+        path_parameters = method_introspectors[0].build_path_parameters() if method_introspectors else []
+        method_serializers = [
+            (method_introspector.get_yaml_parser().get_param(param_name='tags', default=[]),
+             self.get_method_serializers(method_introspector))
+            for method_introspector in introspector
+        ]
+        depends_on_user = any(method_introspector.depends_on_user() for method_introspector in introspector)
+        return IntrospectedEndpoint(operations, path_parameters, method_serializers, depends_on_user)
+
+    def introspect_operation(self, method_introspector):
+        doc_parser = method_introspector.get_yaml_parser()
+        operation_method = method_introspector.get_http_method()
+        operation_security = method_introspector.get_security()
+        explicit_serializers = set()
+
+        operation = {
+            'method': operation_method,
+            'description': method_introspector.get_description(),
+            'summary': method_introspector.get_summary(),
+            'operationId': method_introspector.get_operation_id(),
+            'tags': doc_parser.get_param(param_name='tags', default=[]),
+            'parameters': self._get_operation_parameters(method_introspector, operation_method,
+                                                         explicit_serializers)
+        }
+
+        if operation_security is not None:
+            operation['security'] = operation_security
+
+        if doc_parser.yaml_error is not None:
+            operation['notes'] += '<pre>YAMLError:\n {err}</pre>'.format(
+                err=doc_parser.yaml_error)
+
+        # write the default "success" responses
+        success_code, success_body = self._get_operation_success_response(
+            doc_parser, method_introspector
+        )
+        response_messages = {success_code: success_body}
+
+        # add more responses from docstrings
+        response_messages.update(doc_parser.get_response_messages())
+
+        return {
+            'config_name': doc_parser.get_param(param_name='swagger_config_name', default=False),
+            'tags': operation['tags'],
+            'produces': doc_parser.get_param(param_name='produces', default=None),
+            'consumes': doc_parser.get_param(param_name='consumes', default=None),
+            'view_produces': method_introspector.get_produces(),
+            'view_consumes': method_introspector.get_consumes(),
+            'operation': operation,
+            'responses': response_messages,
+            'explicit_serializers': explicit_serializers,
+        }
+
+    def get_path_item(self, api_endpoint, explicit_serializers=None):
+        introspected_endpoint = self.get_introspected_endpoint(api_endpoint)
 
         path_item = {}
 
-        for operation in self.get_operations(api_endpoint, introspector):
+        for operation in self.get_operations(api_endpoint, introspected_endpoint, explicit_serializers):
             path_item[operation.pop('method').lower()] = operation
         if not path_item:
             return False
 
-        method_introspectors = self.get_method_introspectors(api_endpoint, introspector)
         # we get the main parameters (common to all operations) from the first view operation
         # only path parameters are commont to all operations
-        path_item['parameters'] = self.fill_path_parameters(method_introspectors[0].build_path_parameters())
+        path_item['parameters'] = self.fill_path_parameters(copy.deepcopy(introspected_endpoint.path_parameters))
         return path_item
 
     def fill_path_parameters(self, path_parameters):
         """
-        If configured it will try to import the global parameters definition
-        (from the swagger config) and (if found) will merge the gobal parameters
-        definitions with the path_parameters.
+        If configured (global_parametters_docs), merges the gobal parameters
+        definitions of the config with the path_parameters.
         This is used for parameters defined in the url path
         """
         if not path_parameters:
             return []
 
-        params_module = self.config.get('global_parametters_docs')
-        if not params_module:
-            return path_parameters
-
-        params_module = import_module(params_module)
-
-        global_parameters = getattr(params_module, 'GLOBAL_PARAMETERS')
+        global_parameters = self.config.global_parameters
 
         for parameter in path_parameters:
             global_param = global_parameters.get(parameter['name'])
@@ -117,38 +440,44 @@ class DocumentationGenerator(object):
                 isinstance(method_introspector, BaseMethodIntrospector) and
                 not method_introspector.get_http_method() == "OPTIONS"]
 
-    def get_operations(self, api_endpoint, introspector):
+    def get_media_types(self, introspected_operation, key):
+        """
+        Returns the produces or consumes list of an operation
+        (None for the consumes of the methods without body)
+        """
+        if introspected_operation[key] is not None:
+            return introspected_operation[key]
+        view_media_types = introspected_operation['view_' + key]
+        if view_media_types is not None and self.config.get(key) is not None:
+            return self.config[key]
+        return view_media_types
+
+    def get_operations(self, api_endpoint, introspected_endpoint, explicit_serializers=None):
         """
-        Return docs for the allowed methods of an API endpoint
+        Return docs for the allowed methods of an API endpoint, projected on the config
         """
+        if explicit_serializers is None:
+            explicit_serializers = self.explicit_serializers
         operations = []
 
-        for method_introspector in self.get_method_introspectors(api_endpoint, introspector):
-            doc_parser = method_introspector.get_yaml_parser()
+        for introspected_operation in introspected_endpoint.operations:
             # check if operation is allowed on the current swagger config name
-            operation_config_name = doc_parser.get_param(param_name='swagger_config_name', default=False)
+            operation_config_name = introspected_operation['config_name']
             if operation_config_name and operation_config_name != self.config_name:
                 continue
 
-            operation_method = method_introspector.get_http_method()
-            operation_security = method_introspector.get_security()
-
-            operation = {
-                'method': operation_method,
-                'description': method_introspector.get_description(),
-                'summary': method_introspector.get_summary(),
-                'operationId': method_introspector.get_operation_id(),
-                'produces': doc_parser.get_param(param_name='produces', default=self.config.get('produces')),
-                'tags': doc_parser.get_param(param_name='tags', default=[]),
-                'parameters': self._get_operation_parameters(method_introspector, operation_method)
-            }
+            if not self.is_operation_included(introspected_operation['tags']):
+                continue
 
-            if operation_security is not None:
-                operation['security'] = operation_security
+            explicit_serializers.update(introspected_operation['explicit_serializers'])
 
-            if doc_parser.yaml_error is not None:
-                operation['notes'] += '<pre>YAMLError:\n {err}</pre>'.format(
-                    err=doc_parser.yaml_error)
+            # the introspection is shared by the configs, each one gets its own copy
+            operation = copy_operation(introspected_operation['operation'])
+            # the docstring, then the config, then the view renderers and parsers
+            operation['produces'] = self.get_media_types(introspected_operation, 'produces')
+            consumes = self.get_media_types(introspected_operation, 'consumes')
+            if consumes:
+                operation['consumes'] = consumes
 
             response_messages = {}
             # set default response reference
@@ -160,14 +489,8 @@ class DocumentationGenerator(object):
                     }
                 }
 
-            # write the default "success" responses
-            success_code, success_body = self._get_operation_success_response(
-                doc_parser, method_introspector
-            )
-            response_messages[success_code] = success_body
-
-            # overwrite default and add more responses from docstrings
-            response_messages.update(doc_parser.get_response_messages())
+            # overwrite default with the introspected and docstrings responses
+            response_messages.update(copy_responses(introspected_operation['responses']))
 
             operation['responses'] = response_messages
 
@@ -247,18 +570,20 @@ class DocumentationGenerator(object):
 
         return (success_code, success_body)
 
-    def _get_operation_parameters(self, introspector, method):
+    def _get_operation_parameters(self, introspector, method, explicit_serializers=None):
         """
         :param introspector: method introspector
         :return : if the serializer must be placed in the body, it will build
         the body parameters and add the serializer to the explicit_serializers list
         else it will discover the parameters (from docstring and serializer)
         """
+        if explicit_serializers is None:
+            explicit_serializers = self.explicit_serializers
         serializer = introspector.get_request_serializer_class()
         parameters = []
         if (method in ('POST', 'PUT', 'PATCH') and hasattr(serializer, "Meta") and
            hasattr(serializer.Meta, "_in") and serializer.Meta._in == "body"):
-            self.explicit_serializers.add(serializer)
+            explicit_serializers.add(serializer)
             parameters.append(introspector.build_body_parameters())
 
         parameters.extend(
@@ -297,27 +622,65 @@ class DocumentationGenerator(object):
         Builds a list of Swagger 'models'. These represent
         DRF serializers and their fields
         """
+        serializers = self.get_definition_serializers(endpoints_conf)
+
+        models = {}
+
+        for serializer_models in self.map('_get_serializer_models', serializers):
+            models.update(serializer_models)
+
+        models.update(self.explicit_response_types)
+        models.update(self.fields_serializers)
+        return OrderedDict(sorted(models.items()))
+
+    def iter_definitions(self, endpoints_conf):
+        """
+        Yields the (name, definition) of get_definitions one at a time, in the
+        same order. Must run after get_paths/iter_paths, which collect the
+        serializers documented in the docstrings.
+        """
+        # name => serializer to describe, the last one wins as in get_definitions
+        serializers_by_name = {}
+        for serializer in self.get_definition_serializers(endpoints_conf):
+            if hasattr(serializer, "Meta") and hasattr(serializer.Meta, "child"):
+                serializers_by_name[get_serializer_name(serializer.Meta.child)] = serializer.Meta.child
+            serializers_by_name[get_serializer_name(serializer)] = serializer
+
+        names = set(serializers_by_name)
+        names.update(self.explicit_response_types)
+        for name in sorted(names):
+            if name in self.explicit_response_types:
+                yield name, self.explicit_response_types[name]
+            else:
+                yield name, self.get_definition(serializers_by_name[name])
+
+    def get_definition_serializers(self, endpoints_conf):
+        """
+        Returns the serializers to describe in the definitions
+        """
         serializers = self._get_serializer_set(endpoints_conf)
         serializers.update(self.explicit_serializers)
         serializers.update(
             self._find_field_serializers(serializers)
         )
 
-        models = {}
-
-        for serializer in serializers:
-            serializer_name = get_serializer_name(serializer)
+        # sorted so serializers sharing a name always resolve the same way
+        return sorted(serializers, key=serializer_sort_key)
 
-            if hasattr(serializer, "Meta") and hasattr(serializer.Meta, "child"):
-                child_serializer = serializer.Meta.child
-                child_serializer_name = get_serializer_name(child_serializer)
-                models[child_serializer_name] = self.get_definition(child_serializer)
+    def _get_serializer_models(self, serializer):
+        """
+        Returns the [(name, definition)] of a serializer (and of its child if any)
+        """
+        serializer_models = []
+        serializer_name = get_serializer_name(serializer)
 
-            models[serializer_name] = self.get_definition(serializer)
+        if hasattr(serializer, "Meta") and hasattr(serializer.Meta, "child"):
+            child_serializer = serializer.Meta.child
+            child_serializer_name = get_serializer_name(child_serializer)
+            serializer_models.append((child_serializer_name, self.get_definition(child_serializer)))
 
-        models.update(self.explicit_response_types)
-        models.update(self.fields_serializers)
-        return models
+        serializer_models.append((serializer_name, self.get_definition(serializer)))
+        return serializer_models
 
     def get_definition(self, serializer):
         """
@@ -356,19 +719,41 @@ class DocumentationGenerator(object):
         """
         serializers = set()
 
+        self.introspect_endpoints(endpoints_conf)
         for endpoint in endpoints_conf:
-            introspector = self.get_introspector(endpoint)
-            for method_introspector in introspector:
-                serializer = method_introspector.get_response_serializer_class()
-                if serializer is not None:
-                    serializers.add(serializer)
-                extras = method_introspector.get_extra_serializer_classes()
-                for extra in extras:
-                    if extra is not None:
-                        serializers.add(extra)
+            serializers.update(self._get_endpoint_serializers(endpoint))
 
         return serializers
 
+    def _get_endpoint_serializers(self, endpoint):
+        """
+        Returns the set of serializer classes used by an endpoint
+        """
+        serializers = set()
+
+        endpoint_serializers = self.endpoint_serializers.get(self.get_endpoint_key(endpoint))
+        if endpoint_serializers is None:
+            endpoint_serializers = self.get_introspected_endpoint(endpoint).method_serializers
+        for tags, method_serializers in endpoint_serializers:
+            if self.is_operation_included(tags):
+                serializers.update(method_serializers)
+
+        return serializers
+
+    def get_method_serializers(self, method_introspector):
+        """
+        Returns the set of serializer classes used by a method
+        """
+        serializers = set()
+        serializer = method_introspector.get_response_serializer_class()
+        if serializer is not None:
+            serializers.add(serializer)
+        extras = method_introspector.get_extra_serializer_classes()
+        for extra in extras:
+            if extra is not None:
+                serializers.add(extra)
+        return serializers
+
     def _find_field_serializers(self, serializers, found_serializers=set()):
         """
         Returns set of serializers discovered from fields
@@ -506,3 +891,25 @@ class DocumentationGenerator(object):
             # memorize discovered field
             data['fields'][name] = f
         return data
+
+
+def serializer_sort_key(serializer):
+    serializer_class = serializer if inspect.isclass(serializer) else serializer.__class__
+    return (get_serializer_name(serializer), serializer_class.__module__, serializer_class.__name__)
+
+
+def find_definition_refs(obj):
+    """
+    Returns the names of the definitions referenced ($ref) in a swagger object
+    """
+    refs = set()
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            if key == '$ref' and isinstance(value, six.string_types) and value.startswith('#/definitions/'):
+                refs.add(value[len('#/definitions/'):])
+            else:
+                refs.update(find_definition_refs(value))
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            refs.update(find_definition_refs(value))
+    return refs
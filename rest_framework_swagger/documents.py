@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+Builds (and caches) the swagger documents, inside or outside of a request.
+
+This module is imported with the urlconf: the generation modules (and their
+yaml, markdown and admindocs dependencies) are only imported by the first
+generate_document() call.
+"""
+import json
+import logging
+import threading
+
+from django.conf import settings
+from django.test.signals import setting_changed
+from rest_framework.settings import api_settings
+
+from . import cache
+from .config import get_config
+from .encoding import EncodedDocument, iter_json
+from .utils import extract_base_path, get_user_fingerprint
+
+try:
+    JSONRenderer = list(filter(
+        lambda item: item.format == 'json',
+        api_settings.DEFAULT_RENDERER_CLASSES,
+    ))[0]
+except IndexError:
+    from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# set once warm_up() is done
+warmed_up = threading.Event()
+
+# config name => whether its document depends on the user
+_user_dependent_configs = {}
+
+# full document etag => tags of the document, see normalize_slice()
+_document_tags = {}
+MAX_DOCUMENT_TAGS = 64
+
+
+def get_document_key(config_name, version='', user_fingerprint=None, tags=(), paths=()):
+    """
+    The generated document depends on the config, the api version, (through
+    the views serializers) the kind of user if any view looks at it, and the
+    requested slice
+    """
+    return (
+        config_name,
+        version,
+        user_fingerprint,
+        tuple(tags),
+        tuple(path.strip('/') for path in paths),
+    )
+
+
+def depends_on_user(config, config_name=None, request=None):
+    """
+    Whether the document of a config can change with the user, found (once)
+    by introspecting its endpoints for the anonymous user
+    """
+    if config_name not in _user_dependent_configs:
+        from .docgenerator import DocumentationGenerator
+        from .urlparser import UrlParser
+
+        generator = DocumentationGenerator(config=config, config_name=config_name, request=request)
+        _user_dependent_configs[config_name] = generator.depends_on_user(UrlParser(config, request).get_apis())
+    return _user_dependent_configs[config_name]
+
+
+def clear_user_dependent_configs(*args, **kwargs):
+    if kwargs['setting'] in cache.INVALIDATING_SETTINGS:
+        _user_dependent_configs.clear()
+
+
+setting_changed.connect(clear_user_dependent_configs)
+
+
+def generate_document(config, config_name=None, user=None, request=None, tags=None, paths=None,
+                      workers=None, use_processes=False, dedupe=None, url_index=None):
+    """
+    Returns the swagger document (a dict) of a config,
+    deduped if dedupe (by default the 'dedupe' swagger setting).
+    url_index (a UrlIndex) replaces the ROOT_URLCONF endpoints, i.e. for the offline generation.
+    """
+    from .dedupe import dedupe_document
+    from .docgenerator import DocumentationGenerator
+    from .urlparser import UrlParser
+
+    generator = DocumentationGenerator(
+        for_user=user,
+        config=config,
+        config_name=config_name,
+        request=request,
+        tags=tags,
+        paths=paths,
+        workers=workers or config.get('introspection_workers', 1),
+        use_processes=use_processes,
+    )
+    document = generator.get_root(UrlParser(config, request, url_index).get_apis())
+    if dedupe is None:
+        dedupe = config.get('dedupe')
+    if dedupe:
+        document = dedupe_document(document)
+    return document
+
+
+def stream_document(config, config_name=None, user=None, request=None):
+    """
+    Yields the JSON document of a config in utf-8 chunks, generating its paths
+    and definitions one at a time so the memory used doesn't grow with the
+    API. Errors raised while streaming truncate the document.
+    """
+    from .docgenerator import DocumentationGenerator
+    from .urlparser import UrlParser
+
+    generator = DocumentationGenerator(
+        for_user=user,
+        config=config,
+        config_name=config_name,
+        request=request,
+    )
+    data = generator.iter_root(UrlParser(config, request).get_apis())
+    renderer = JSONRenderer()
+    encoder = renderer.encoder_class(
+        ensure_ascii=getattr(renderer, 'ensure_ascii', True),
+        separators=(',', ':') if getattr(renderer, 'compact', True) else (', ', ': '),
+    )
+    for chunk in iter_json(data, encoder):
+        yield chunk.encode('utf-8')
+
+
+def get_encoded_document(config, config_name=None, user=None, request=None, tags=(), paths=()):
+    """
+    Returns the cached EncodedDocument of a config, generating it if needed.
+    Documents not depending on the user are shared by all the users, the
+    others by the users having the same permissions fingerprint.
+    """
+    version = request.parser_context['kwargs'].get('version', '') if request is not None else ''
+    user_fingerprint = None
+    if depends_on_user(config, config_name, request):
+        user_fingerprint = get_user_fingerprint(user)
+    return cache.get_or_build(
+        get_document_key(config_name, version, user_fingerprint, tags, paths),
+        lambda: EncodedDocument.render(
+            generate_document(config, config_name, user, request, tags, paths),
+            JSONRenderer
+        ),
+        # the slices stay in the per process cache
+        shared=not (tags or paths),
+    )
+
+
+def get_document_tags(document):
+    """
+    Returns the tags found in a full EncodedDocument, parsed once per document
+    """
+    from .diff import HTTP_METHODS
+
+    tags = _document_tags.get(document.etag)
+    if tags is None:
+        tags = set()
+        for path_item in json.loads(document.content.decode('utf-8')).get('paths', {}).values():
+            for method, operation in path_item.items():
+                if method in HTTP_METHODS:
+                    tags.update(operation.get('tags') or [])
+        tags = frozenset(tags)
+        if len(_document_tags) >= MAX_DOCUMENT_TAGS:
+            _document_tags.clear()
+        _document_tags[document.etag] = tags
+    return tags
+
+
+def get_endpoint_paths(config, request=None):
+    """
+    Returns the paths of the endpoints of a config as requested in the slices,
+    read from the urlconf (nothing is introspected)
+    """
+    from .urlparser import UrlParser
+
+    return frozenset(
+        extract_base_path(path=endpoint['path'], base_path=config.get('basePath')).strip('/')
+        for endpoint in UrlParser(config, request).get_apis()
+    )
+
+
+def normalize_slice(config, config_name=None, user=None, request=None, tags=(), paths=()):
+    """
+    Returns the sorted (tags, paths) of a requested slice that the config knows,
+    so the unknown values never make it to the cache keys. The paths are checked
+    against the endpoints, the tags (only known once introspected) against the
+    full document.
+    """
+    known_tags, known_paths = [], []
+    if paths:
+        known_paths = sorted(set(path.strip('/') for path in paths) & get_endpoint_paths(config, request))
+    if tags:
+        known_tags = sorted(set(tags) & get_document_tags(get_encoded_document(config, config_name, user, request)))
+    return known_tags, known_paths
+
+
+def get_config_names():
+    """
+    The config names served by the swagger urls (None is /swagger.json)
+    """
+    return [None] + sorted(settings.SWAGGER_LOCAL_SETTINGS)
+
+
+def warm_up():
+    """
+    Generates and caches the (anonymous) documents of every config
+    """
+    for config_name in get_config_names():
+        try:
+            get_encoded_document(get_config(config_name), config_name)
+        except Exception:
+            logger.exception("could not warm up the %s swagger document", config_name or "default")
+    warmed_up.set()
+
+
+def is_warm():
+    return warmed_up.is_set()
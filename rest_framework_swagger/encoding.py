@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""Pre-encoded (and pre-compressed) swagger documents."""
+import gzip
+import hashlib
+import io
+import json
+import time
+import types
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .compat import OrderedDict
+
+
+def gzip_compress(content):
+    buf = io.BytesIO()
+    # mtime=0 keeps the output (and so the ETag) stable between builds
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=9, mtime=0) as gzip_file:
+        gzip_file.write(content)
+    return buf.getvalue()
+
+
+def parse_accept_encoding(header):
+    """
+    Returns a dict {coding: qvalue} from an Accept-Encoding header
+    """
+    codings = {}
+    for item in header.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        if not coding:
+            continue
+        qvalue = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        codings[coding] = qvalue
+    return codings
+
+
+class EncodedDocument(object):
+    """
+    The rendered bytes of a document together with its compressed variants,
+    so serving it is just picking the right bytes for the Accept-Encoding header.
+    """
+
+    def __init__(self, content, content_type):
+        self.content_type = content_type
+        self.etag = '"{}"'.format(hashlib.md5(content).hexdigest())
+        self.built_at = time.time()
+        # ordered by preference
+        self.variants = OrderedDict()
+        if brotli is not None:
+            self.variants['br'] = brotli.compress(content)
+        self.variants['gzip'] = gzip_compress(content)
+        self.variants['identity'] = content
+
+    @classmethod
+    def render(cls, data, renderer_class):
+        renderer = renderer_class()
+        content = renderer.render(data)
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        return cls(content, content_type)
+
+    @property
+    def content(self):
+        return self.variants['identity']
+
+    def dumps(self):
+        """
+        Returns the document as bytes: a JSON header line followed by the variants
+        """
+        header = {
+            'content_type': self.content_type,
+            'etag': self.etag,
+            'built_at': self.built_at,
+            'variants': [[coding, len(body)] for coding, body in self.variants.items()],
+        }
+        return json.dumps(header).encode('utf-8') + b'\n' + b''.join(self.variants.values())
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Returns the document dumped by dumps(), raises ValueError if data is not one
+        """
+        header, _, body = data.partition(b'\n')
+        try:
+            header = json.loads(header.decode('utf-8'))
+            document = cls.__new__(cls)
+            document.content_type = header['content_type']
+            document.etag = header['etag']
+            document.built_at = header['built_at']
+            document.variants = OrderedDict()
+            offset = 0
+            for coding, length in header['variants']:
+                document.variants[coding] = body[offset:offset + length]
+                offset += length
+        except (KeyError, TypeError, UnicodeDecodeError) as e:
+            raise ValueError("not a dumped document: {}".format(e))
+        if offset != len(body) or 'identity' not in document.variants:
+            raise ValueError("truncated document")
+        return document
+
+    def negotiate(self, accept_encoding):
+        """
+        Returns the (content_encoding, body) best matching the Accept-Encoding header
+        """
+        codings = parse_accept_encoding(accept_encoding or '')
+        identity_qvalue = codings.get('identity', codings.get('*', 1.0))
+        best, best_qvalue = 'identity', 0.0
+        for coding in self.variants:
+            if coding == 'identity':
+                continue
+            qvalue = codings.get(coding, codings.get('*', 0.0))
+            if qvalue > best_qvalue and qvalue >= identity_qvalue:
+                best, best_qvalue = coding, qvalue
+        return best, self.variants[best]
+
+
+def iter_json(data, encoder):
+    """
+    Yields the JSON of a dict in chunks. Its generator values, of (name, item)
+    pairs, are encoded as objects one item at a time.
+    """
+    yield '{'
+    for index, (key, value) in enumerate(data.items()):
+        prefix = encoder.encode(key) + ':'
+        if index:
+            prefix = ',' + prefix
+        if not isinstance(value, types.GeneratorType):
+            yield prefix + encoder.encode(value)
+            continue
+        yield prefix + '{'
+        for item_index, (name, item) in enumerate(value):
+            chunk = encoder.encode(name) + ':' + encoder.encode(item)
+            yield ',' + chunk if item_index else chunk
+        yield '}'
+    yield '}'
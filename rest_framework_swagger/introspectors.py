@@ -2,23 +2,26 @@
 
 """Handles the instrospection of REST Framework Views and ViewSets."""
 
+import inspect
 import itertools
 import re
 import logging
 
 from .compat import strip_tags, get_pagination_attribures
 from .yamlparser import YAMLDocstringParser
-from .constants import INTROSPECTOR_ENUMS, INTROSPECTOR_PRIMITIVES
-from .utils import (normalize_data_format, get_view_description,
-                    do_markdown, get_serializer_name)
+from .constants import BODY_METHODS, INTROSPECTOR_ENUMS, INTROSPECTOR_PRIMITIVES
+from .utils import (normalize_data_format, get_view_description, get_media_types,
+                    do_markdown, get_serializer_name, get_user_fingerprint)
 from abc import ABCMeta, abstractmethod
 
 from django.http import HttpRequest
 from django.contrib.admindocs.utils import trim_docstring
+from django.test.signals import setting_changed
 from django.utils.encoding import smart_text
 
 import rest_framework
 from rest_framework import viewsets
+from rest_framework.generics import GenericAPIView
 from rest_framework.utils import formatting
 from rest_framework.mixins import ListModelMixin
 try:
@@ -57,13 +60,12 @@ class IntrospectorHelper(object):
         Strips the params from the docstring (ie. myparam -- Some param) will
         not be removed from the text body
         """
-        params_pattern = re.compile(r' -- ')
         split_lines = trim_docstring(docstring).split('\n')
 
         cut_off = None
         for index, line in enumerate(split_lines):
             line = line.strip()
-            if params_pattern.search(line):
+            if ' -- ' in line:
                 cut_off = index
                 break
         if cut_off is not None:
@@ -76,6 +78,12 @@ class IntrospectorHelper(object):
         """
         Returns the first sentence of the first line of the class docstring
         """
+        if docstring is None:
+            docstring = get_view_metadata(callback).description
+        return IntrospectorHelper.parse_docstring(callback, docstring).summary
+
+    @staticmethod
+    def build_summary(callback, docstring=None):
         description = get_view_description(
             callback, html=False, docstring=docstring) \
             .split("\n")[0].split(".")[0]
@@ -87,6 +95,129 @@ class IntrospectorHelper(object):
             callback, html=True, docstring=description))
         return description
 
+    @staticmethod
+    def parse_docstring(callback, docstring):
+        """
+        Returns the ParsedDocstring of a view (or view method) description.
+        Descriptions are parsed once, the result is shared by all the views
+        having the same docstring.
+        """
+        parsed = _parsed_docstrings.get(docstring)
+        if parsed is None:
+            parsed = _parsed_docstrings[docstring] = ParsedDocstring(callback, docstring)
+        return parsed
+
+    @staticmethod
+    def render_markdown(docstring):
+        html = _rendered_markdown.get(docstring)
+        if html is None:
+            html = _rendered_markdown[docstring] = do_markdown(docstring)
+        return html
+
+
+class ParsedDocstring(object):
+    """
+    The parts of a description used by the introspectors, all extracted in one go:
+     - body: the text without the YAML and the parameters
+     - summary: the plain text first sentence
+     - query_parameters: the (name, description) of the "name -- description" lines
+    """
+
+    def __init__(self, callback, docstring):
+        docstring = docstring or ''
+        body = formatting.dedent(smart_text(docstring))
+        body = IntrospectorHelper.strip_yaml_from_docstring(body)
+        self.body = IntrospectorHelper.strip_params_from_docstring(body)
+        self.summary = IntrospectorHelper.build_summary(callback, docstring)
+        self.query_parameters = []
+        for line in docstring.split('\n'):
+            param = line.split(' -- ')
+            if len(param) == 2:
+                self.query_parameters.append((param[0].strip(), param[1].strip()))
+
+
+_parsed_docstrings = {}
+_rendered_markdown = {}
+
+
+class ViewMetadata(object):
+    """
+    Everything the introspectors read from a view class, computed once per class
+    (the view is instantiated a single time) and shared by all the introspections.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.allowed_methods = callback().allowed_methods
+        self.serializer_class = getattr(callback, 'serializer_class', None)
+        self.pagination_class = getattr(callback, 'pagination_class', None)
+        self.description = get_view_description(callback)
+        # the default get_serializer_class() just returns serializer_class,
+        # there is no need to create a view to ask for it
+        self.has_static_serializer_class = (
+            self.serializer_class is not None and
+            getattr(callback, 'get_serializer_class', None) == GenericAPIView.get_serializer_class
+        )
+        # filled lazily by the introspectors
+        self.actions = None
+        self.method_descriptions = {}
+        self.serializer_classes = {}
+        # the operations whose serializer class depends on the request user
+        self.user_dependent_operations = set()
+
+    def get_method_description(self, method):
+        """
+        Returns the description of a view method or None if the method does not exist
+        """
+        if method not in self.method_descriptions:
+            if hasattr(self.callback, method):
+                description = get_view_description(getattr(self.callback, method))
+            else:
+                description = None
+            self.method_descriptions[method] = description
+        return self.method_descriptions[method]
+
+
+_view_metadata = {}
+
+
+class IntrospectionRequest(HttpRequest):
+    """
+    The fake request of the views created by the introspectors,
+    it records whether the view looked at its user
+    """
+
+    def __init__(self, user):
+        super(IntrospectionRequest, self).__init__()
+        self._user = user
+        self.user_accessed = False
+
+    @property
+    def user(self):
+        self.user_accessed = True
+        return self._user
+
+    @user.setter
+    def user(self, user):
+        self._user = user
+
+
+def get_view_metadata(callback):
+    metadata = _view_metadata.get(callback)
+    if metadata is None:
+        metadata = _view_metadata[callback] = ViewMetadata(callback)
+    return metadata
+
+
+def clear_view_metadata(*args, **kwargs):
+    if kwargs.get('setting') in (None, 'REST_FRAMEWORK'):
+        _view_metadata.clear()
+        _parsed_docstrings.clear()
+        _rendered_markdown.clear()
+
+
+setting_changed.connect(clear_view_metadata)
+
 
 class BaseViewIntrospector(object):
     __metaclass__ = ABCMeta
@@ -97,6 +228,10 @@ class BaseViewIntrospector(object):
         self.pattern = pattern
         self.user = user
 
+    @property
+    def metadata(self):
+        return get_view_metadata(self.callback)
+
     def get_yaml_parser(self):
         parser = YAMLDocstringParser(self)
         return parser
@@ -115,7 +250,7 @@ class BaseViewIntrospector(object):
         return IntrospectorHelper.get_summary(self.callback)
 
     def get_docs(self):
-        return get_view_description(self.callback)
+        return self.metadata.description
 
 
 class BaseMethodIntrospector(object):
@@ -134,6 +269,20 @@ class BaseMethodIntrospector(object):
     def get_module(self):
         return self.callback.__module__
 
+    def get_produces(self):
+        """
+        Returns the media types of the view renderers
+        """
+        return get_media_types(getattr(self.callback, 'renderer_classes', ()))
+
+    def get_consumes(self):
+        """
+        Returns the media types of the view parsers, None for the methods without body
+        """
+        if self.get_http_method() not in BODY_METHODS:
+            return None
+        return get_media_types(getattr(self.callback, 'parser_classes', ()))
+
     def check_yaml_methods(self, yaml_methods):
         missing_set = set()
         for key in yaml_methods:
@@ -159,15 +308,50 @@ class BaseMethodIntrospector(object):
             self.callback)
 
     def ask_for_serializer_class(self):
+        metadata = self.parent.metadata
+        parser = self.get_yaml_parser()
+        if metadata.has_static_serializer_class and 'view_mocker' not in parser.object:
+            return metadata.serializer_class
+
+        # get_serializer_class() may depend on the request (method, user) so
+        # the result is only shared by the lookups of the same operation, and
+        # of the same kind of user when the view looks at the user
+        key = self.get_operation_key()
+        if key in metadata.user_dependent_operations:
+            key += (get_user_fingerprint(self.user),)
+        if key not in metadata.serializer_classes:
+            serializer_class, user_accessed = self._ask_view_for_serializer_class(parser)
+            if user_accessed:
+                metadata.user_dependent_operations.add(key)
+                key += (get_user_fingerprint(self.user),)
+            metadata.serializer_classes[key] = serializer_class
+        return metadata.serializer_classes[key]
+
+    def get_operation_key(self):
+        return self.method, self.get_http_method(), self.parent.pattern
+
+    def depends_on_user(self):
+        """
+        Whether the serializer class of the operation depends on the user
+        (known once the serializer class was asked for)
+        """
+        return self.get_operation_key() in self.parent.metadata.user_dependent_operations
+
+    def _ask_view_for_serializer_class(self, parser):
+        """
+        Returns the serializer class and whether the view looked at the request user
+        """
         if hasattr(self.callback, 'get_serializer_class'):
             view = self.create_view()
-            parser = self.get_yaml_parser()
             mock_view = parser.get_view_mocker(self.callback)
             view = mock_view(view)
             if view is not None:
-                return view.get_serializer_class()
+                serializer_class = view.get_serializer_class()
+                # a mocker replacing the request may use any user
+                return serializer_class, getattr(view.request, 'user_accessed', True)
         if hasattr(self.callback, 'serializer_class'):
-            return self.callback.serializer_class
+            return self.callback.serializer_class, False
+        return None, False
 
     def create_view(self):
         view = self.callback()
@@ -175,8 +359,7 @@ class BaseMethodIntrospector(object):
             view.kwargs = dict()
         if hasattr(self.parent.pattern, 'default_args'):
             view.kwargs.update(self.parent.pattern.default_args)
-        view.request = HttpRequest()
-        view.request.user = self.user
+        view.request = IntrospectionRequest(self.user)
         view.request.method = self.method
         return view
 
@@ -225,25 +408,17 @@ class BaseMethodIntrospector(object):
         """
         docstring = ""
 
-        class_docs = get_view_description(self.callback)
-        class_docs = IntrospectorHelper.strip_yaml_from_docstring(class_docs)
-        class_docs = IntrospectorHelper.strip_params_from_docstring(class_docs)
+        class_docs = IntrospectorHelper.parse_docstring(
+            self.callback, self.parent.metadata.description).body
         method_docs = self.get_docs()
 
         if class_docs is not None:
             docstring += class_docs + "  \n"
         if method_docs is not None:
-            method_docs = formatting.dedent(smart_text(method_docs))
-            method_docs = IntrospectorHelper.strip_yaml_from_docstring(
-                method_docs
-            )
-            method_docs = IntrospectorHelper.strip_params_from_docstring(
-                method_docs
-            )
-            docstring += '\n' + method_docs
+            docstring += '\n' + IntrospectorHelper.parse_docstring(self.callback, method_docs).body
         docstring = docstring.strip()
 
-        return do_markdown(docstring) if use_markdown else docstring.replace("\n", " ")
+        return IntrospectorHelper.render_markdown(docstring) if use_markdown else docstring.replace("\n", " ")
 
     def get_parameters(self):
         """
@@ -280,10 +455,7 @@ class BaseMethodIntrospector(object):
         if the method does not exist
         """
         method = str(self.method).lower()
-        if not hasattr(self.callback, method):
-            return None
-
-        return get_view_description(getattr(self.callback, method))
+        return self.parent.metadata.get_method_description(method)
 
     def build_body_parameters(self):
         serializer = self.get_request_serializer_class()
@@ -320,20 +492,14 @@ class BaseMethodIntrospector(object):
     def build_query_parameters(self):
         params = []
 
-        docstring = self.retrieve_docstring() or ''
-        docstring += "\n" + get_view_description(self.callback)
-
-        if docstring is None:
-            return params
-
-        split_lines = docstring.split('\n')
-
-        for line in split_lines:
-            param = line.split(' -- ')
-            if len(param) == 2:
+        docstrings = (self.retrieve_docstring(), self.parent.metadata.description)
+        for docstring in docstrings:
+            if not docstring:
+                continue
+            for name, description in IntrospectorHelper.parse_docstring(self.callback, docstring).query_parameters:
                 params.append({'in': 'query',
-                               'name': param[0].strip(),
-                               'description': param[1].strip(),
+                               'name': name,
+                               'description': description,
                                'type': 'string'})
 
         return params
@@ -366,7 +532,7 @@ class BaseMethodIntrospector(object):
         return None
 
     def get_pagination_class(self):
-        return self.callback.pagination_class if hasattr(self.callback, 'pagination_class') else None
+        return self.parent.metadata.pagination_class
 
     def build_query_parameters_from_django_filters(self):
         """
@@ -394,58 +560,78 @@ class BaseMethodIntrospector(object):
         return params
 
 
-def get_data_type(field):
+# field class => swagger (type, format), or a function of the field returning it
+_data_types = {}
+# field class => the data type of its closest registered class (see get_data_type)
+_resolved_data_types = {}
+
+DEFAULT_DATA_TYPE = ('string', 'string')
+
+
+def register_data_type(field_class, data_type):
+    """
+    Documents the fields of field_class (and of its subclasses) as data_type:
+    a (type, format) tuple or a function of the field returning it, i.e.:
+        register_data_type(MoneyField, ('number', 'double'))
+    """
+    _data_types[field_class] = data_type
+    _resolved_data_types.clear()
+
+
+def get_choice_data_type(field):
+    first_key = next(iter(field.choices), None)
+    if isinstance(first_key, int):
+        return 'integer', 'int64'
+    return 'string', 'string'
+
+
+def register_default_data_types():
     # (in swagger 2.0 we might get to use the descriptive types..
     from rest_framework import fields
 
-    if isinstance(field, fields.BooleanField):
-        return 'boolean', 'boolean'
-    elif isinstance(field, fields.JSONField):
-        return 'object', 'object'
-    elif isinstance(field, fields.ModelField):
-        return 'object', 'object'
-    elif isinstance(field, fields.DictField):
-        return 'object', 'object'
-    elif isinstance(field, fields.ListField):
-        return 'array', "array"
-    elif hasattr(fields, 'NullBooleanField') and isinstance(field, fields.NullBooleanField):
-        return 'boolean', 'boolean'
-    # elif isinstance(field, fields.URLField):
-        # return 'string', 'string' #  'url'
-    # elif isinstance(field, fields.SlugField):
-        # return 'string', 'string', # 'slug'
-    elif isinstance(field, fields.ChoiceField):
-        first_key = field.choices.keys()[0]
-        if isinstance(first_key, int):
-            return 'integer', 'int64'
-        return 'string', 'string'
-    # elif isinstance(field, fields.EmailField):
-        # return 'string', 'string' #  'email'
-    # elif isinstance(field, fields.RegexField):
-        # return 'string', 'string' # 'regex'
-    elif isinstance(field, fields.DateField):
-        return 'string', 'date'
-    elif isinstance(field, fields.DateTimeField):
-        return 'string', 'date-time'  # 'datetime'
-    # elif isinstance(field, fields.TimeField):
-        # return 'string', 'string' # 'time'
-    elif isinstance(field, fields.IntegerField):
-        return 'integer', 'int64'  # 'integer'
-    elif isinstance(field, fields.FloatField):
-        return 'number', 'float'  # 'float'
-    # elif isinstance(field, fields.DecimalField):
-        # return 'string', 'string' #'decimal'
-    # elif isinstance(field, fields.ImageField):
-        # return 'string', 'string' # 'image upload'
-    # elif isinstance(field, fields.FileField):
-        # return 'string', 'string' # 'file upload'
-    # elif isinstance(field, fields.CharField):
-        # return 'string', 'string'
-
-    elif rest_framework.VERSION >= '3.0.0' and isinstance(field, fields.HiddenField):
-        return 'hidden', 'hidden'
-    else:
-        return 'string', 'string'
+    register_data_type(fields.BooleanField, ('boolean', 'boolean'))
+    register_data_type(fields.JSONField, ('object', 'object'))
+    register_data_type(fields.ModelField, ('object', 'object'))
+    register_data_type(fields.DictField, ('object', 'object'))
+    register_data_type(fields.ListField, ('array', 'array'))
+    if hasattr(fields, 'NullBooleanField'):
+        register_data_type(fields.NullBooleanField, ('boolean', 'boolean'))
+    register_data_type(fields.ChoiceField, get_choice_data_type)
+    register_data_type(fields.DateField, ('string', 'date'))
+    register_data_type(fields.DateTimeField, ('string', 'date-time'))  # 'datetime'
+    register_data_type(fields.IntegerField, ('integer', 'int64'))  # 'integer'
+    register_data_type(fields.FloatField, ('number', 'float'))  # 'float'
+    # URLField, SlugField, EmailField, RegexField, TimeField, DecimalField,
+    # ImageField, FileField and CharField are strings
+    if rest_framework.VERSION >= '3.0.0':
+        register_data_type(fields.HiddenField, ('hidden', 'hidden'))
+
+
+register_default_data_types()
+
+
+def resolve_data_type(field_class):
+    """
+    Returns the data type registered for the closest class in the MRO of field_class
+    """
+    for klass in inspect.getmro(field_class):
+        if klass in _data_types:
+            return _data_types[klass]
+    return DEFAULT_DATA_TYPE
+
+
+def get_data_type(field):
+    """
+    Returns the swagger (type, format) of a serializer field, the data type
+    of each field class is resolved once
+    """
+    field_class = field.__class__
+    data_type = _resolved_data_types.get(field_class)
+    if data_type is None:
+        data_type = _resolved_data_types[field_class] = resolve_data_type(field_class)
+    if callable(data_type):
+        return data_type(field)
+    return data_type
 
 
 class APIViewIntrospector(BaseViewIntrospector):
@@ -454,7 +640,7 @@ class APIViewIntrospector(BaseViewIntrospector):
             yield APIViewMethodIntrospector(self, method)
 
     def methods(self):
-        return self.callback().allowed_methods
+        return self.metadata.allowed_methods
 
 
 class GenericViewIntrospector(BaseViewIntrospector):
@@ -498,10 +684,13 @@ class GenericViewIntrospector(BaseViewIntrospector):
                 "get": "list"
             }
         """
-        methods = {}
-        for http_method in self.callback().allowed_methods:
-            methods[http_method] = self._get_action_from_http_method(http_method)
-        return methods
+        metadata = self.metadata
+        if metadata.actions is None:
+            metadata.actions = dict(
+                (http_method, self._get_action_from_http_method(http_method))
+                for http_method in metadata.allowed_methods
+            )
+        return metadata.actions
 
 
 class WrappedAPIViewIntrospector(BaseViewIntrospector):
@@ -510,14 +699,11 @@ class WrappedAPIViewIntrospector(BaseViewIntrospector):
             yield WrappedAPIViewMethodIntrospector(self, method)
 
     def methods(self):
-        return self.callback().allowed_methods
+        return self.metadata.allowed_methods
 
     def get_notes(self):
-        class_docs = get_view_description(self.callback)
-        class_docs = IntrospectorHelper.strip_yaml_from_docstring(
-            class_docs)
-        class_docs = IntrospectorHelper.strip_params_from_docstring(
-            class_docs)
+        class_docs = IntrospectorHelper.parse_docstring(
+            self.callback, self.metadata.description).body
         return get_view_description(
             self.callback, html=True, docstring=class_docs)
 
@@ -557,7 +743,7 @@ class WrappedAPIViewMethodIntrospector(BaseMethodIntrospector):
         endpoint. If none are available, the class docstring
         will be used
         """
-        return get_view_description(self.callback)
+        return self.parent.metadata.description
 
     def get_module(self):
         from .decorators import wrapper_to_func
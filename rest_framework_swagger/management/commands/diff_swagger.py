@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+
+from django.core.management.base import BaseCommand
+
+from ...config import get_config
+from ...diff import DocumentDiff
+from ...documents import generate_document
+from .generate_swagger import dump_document
+
+
+class Command(BaseCommand):
+    help = ("Compares the swagger document of a swagger config to a previously generated one. "
+            "Exits with status 1 when the API changed, 2 when the previous document can't be read.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('previous',
+                            help="previously generated document (i.e. by generate_swagger)")
+        parser.add_argument('--config', default=None,
+                            help="swagger config name (SWAGGER_LOCAL_SETTINGS key), default config if omitted")
+        parser.add_argument('--output', default=None,
+                            help="file the new document is written to, when it changed")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['previous']) as previous_file:
+                previous = json.load(previous_file)
+        except (IOError, ValueError) as e:
+            self.stderr.write("could not read {}: {}".format(options['previous'], e))
+            sys.exit(2)
+
+        document = generate_document(
+            get_config(options['config']),
+            config_name=options['config'],
+        )
+        diff = DocumentDiff(previous, document)
+        if not diff.has_changes():
+            self.stdout.write("no changes")
+            return
+
+        for line in diff.get_report():
+            self.stdout.write(line)
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                dump_document(document, output)
+        sys.exit(1)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.utils.encoders import JSONEncoder
+
+from ...config import get_config
+from ...documents import generate_document
+from ...offline import OfflineBuilder, get_offline_url_index
+
+
+def dump_document(document, output, minify=False):
+    if minify:
+        json.dump(document, output, cls=JSONEncoder, sort_keys=True, separators=(',', ':'))
+    else:
+        json.dump(document, output, cls=JSONEncoder, indent=2, sort_keys=True, separators=(',', ': '))
+    output.write('\n')
+
+
+class Command(BaseCommand):
+    help = "Generates the swagger document of a swagger config"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--config', default=None,
+                            help="swagger config name (SWAGGER_LOCAL_SETTINGS key), default config if omitted")
+        parser.add_argument('--output', default=None,
+                            help="file the document is written to (default: stdout)")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="number of workers introspecting the endpoints")
+        parser.add_argument('--processes', action='store_true', default=False,
+                            help="use worker processes instead of threads")
+        parser.add_argument('--dedupe', action='store_true', default=None,
+                            help="hoist the repeated schemas and parameters (default: 'dedupe' swagger setting)")
+        parser.add_argument('--minify', action='store_true', default=False,
+                            help="write the document without indentation")
+        parser.add_argument('--offline', action='store_true', default=False,
+                            help="read the urlconfs, views and serializers from their sources "
+                                 "instead of importing them")
+
+    def handle(self, *args, **options):
+        builder = url_index = None
+        if options['offline'] and options['processes']:
+            # the classes rebuilt from the sources can't be pickled back from the workers
+            raise CommandError("--offline can't be combined with --processes, use threads")
+        if options['offline']:
+            builder = OfflineBuilder()
+            url_index = get_offline_url_index(builder=builder)
+
+        document = generate_document(
+            get_config(options['config']),
+            config_name=options['config'],
+            workers=options['workers'],
+            use_processes=options['processes'],
+            dedupe=options['dedupe'],
+            url_index=url_index,
+        )
+        if builder is not None and options['verbosity'] > 1:
+            for name, count in sorted(builder.stats.items()):
+                self.stderr.write("{}: {}".format(name, count))
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                dump_document(document, output, options['minify'])
+        else:
+            dump_document(document, sys.stdout, options['minify'])
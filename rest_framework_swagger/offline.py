@@ -0,0 +1,506 @@
+# -*- coding: utf-8 -*-
+"""
+Offline generation: the swagger documents are built from the sources of the
+project urlconfs, views and serializers (read with ast) instead of importing
+them.
+
+The views and serializers found in the sources are rebuilt as classes
+deriving from the DRF (or library) classes they extend, with only what the
+introspection reads: docstrings, literal attributes, serializer_class,
+declared fields and Meta. Whatever can't be resolved statically (computed
+urlpatterns, get_serializer_class() overrides, decorated actions, fields
+with computed arguments...) is imported instead. The rebuilt views only keep
+the docstrings of their handlers, which can't be called.
+
+django.setup() still imports the models, and whatever the apps import in
+their ready() (i.e. the serializers of products.fragments): those are imported
+offline too.
+"""
+import ast
+import logging
+import os
+import types
+from importlib import import_module
+
+from django.conf import settings
+from django.conf.urls import include, url
+from django.utils import six
+from django.utils.six.moves import builtins
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import MethodNotAllowed
+
+from .urlparser import UrlIndex
+
+logger = logging.getLogger(__name__)
+
+# view methods the introspection calls, views overriding them are imported
+DYNAMIC_VIEW_METHODS = frozenset((
+    '__init__',
+    'get_serializer',
+    'get_serializer_class',
+))
+# serializer methods changing the fields, serializers overriding them are imported
+DYNAMIC_SERIALIZER_METHODS = frozenset((
+    '__init__',
+    'get_fields',
+))
+# view methods documented by the introspection, rebuilt without their code
+HANDLER_METHODS = frozenset((
+    'get',
+    'post',
+    'put',
+    'patch',
+    'delete',
+    'head',
+    'options',
+    'trace',
+    'list',
+    'create',
+    'retrieve',
+    'update',
+    'partial_update',
+    'destroy',
+))
+# view attributes the introspection doesn't read
+IGNORED_VIEW_ATTRIBUTES = frozenset((
+    'queryset',
+))
+
+
+class StaticResolutionError(Exception):
+    """
+    Raised for what can't be resolved from the sources
+    """
+
+
+def find_source(module_name):
+    """
+    Returns the source file of a module without importing it (its parent packages are)
+    """
+    try:
+        from importlib.util import find_spec
+    except ImportError:
+        find_spec = None
+
+    if find_spec is not None:
+        try:
+            spec = find_spec(module_name)
+        except (ImportError, ValueError, AttributeError):
+            spec = None
+        path = getattr(spec, 'origin', None)
+    else:
+        import imp
+        path, search_path = None, None
+        for part in module_name.split('.'):
+            try:
+                module_file, path, _ = imp.find_module(part, search_path)
+            except ImportError:
+                path = None
+                break
+            if module_file is not None:
+                module_file.close()
+            search_path = [path]
+        if path is not None and os.path.isdir(path):
+            path = os.path.join(path, '__init__.py')
+
+    if not path or not path.endswith('.py'):
+        raise StaticResolutionError("no source for {}".format(module_name))
+    return path
+
+
+def import_object(dotted_path):
+    """
+    Imports a module or a module attribute (i.e. django.contrib.admin.site.urls)
+    """
+    parts = dotted_path.split('.')
+    for index in range(len(parts), 0, -1):
+        try:
+            obj = import_module('.'.join(parts[:index]))
+        except ImportError:
+            continue
+        try:
+            for attr in parts[index:]:
+                obj = getattr(obj, attr)
+        except AttributeError:
+            break
+        return obj
+    raise StaticResolutionError("can't import {}".format(dotted_path))
+
+
+def literal(node):
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError):
+        raise StaticResolutionError("not a literal: {}".format(ast.dump(node)))
+
+
+class SourceModule(object):
+    """
+    The top level imports, classes and assignments of a module source
+    """
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.is_package = os.path.basename(path) == '__init__.py'
+        with open(path, 'rb') as source_file:
+            tree = ast.parse(source_file.read(), path)
+
+        # local name => dotted path
+        self.imports = {}
+        self.classes = {}
+        # name => [value nodes], the += included
+        self.assignments = {}
+        for node in tree.body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    if alias.asname:
+                        self.imports[alias.asname] = alias.name
+                    else:
+                        top_level = alias.name.split('.')[0]
+                        self.imports[top_level] = top_level
+            elif isinstance(node, ast.ImportFrom):
+                module = self.resolve_relative(node.module, node.level)
+                for alias in node.names:
+                    if alias.name != '*':
+                        self.imports[alias.asname or alias.name] = '{}.{}'.format(module, alias.name)
+            elif isinstance(node, ast.ClassDef):
+                self.classes[node.name] = node
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        self.assignments[target.id] = [node.value]
+            elif (isinstance(node, ast.AugAssign) and isinstance(node.target, ast.Name) and
+                    isinstance(node.op, ast.Add)):
+                self.assignments.setdefault(node.target.id, []).append(node.value)
+
+    def resolve_relative(self, module, level):
+        if not level:
+            return module
+        package = self.name if self.is_package else self.name.rpartition('.')[0]
+        for _ in range(level - 1):
+            package = package.rpartition('.')[0]
+        return '{}.{}'.format(package, module) if module else package
+
+    def resolve_name(self, node):
+        """
+        Returns the dotted path of a name (or attribute) node
+        """
+        if isinstance(node, ast.Name):
+            if node.id in self.imports:
+                return self.imports[node.id]
+            if node.id in self.classes or node.id in self.assignments:
+                return '{}.{}'.format(self.name, node.id)
+            if hasattr(builtins, node.id):
+                # i.e. object, tuple
+                return '{}.{}'.format(builtins.__name__, node.id)
+            raise StaticResolutionError("unknown name {} in {}".format(node.id, self.name))
+        if isinstance(node, ast.Attribute):
+            return '{}.{}'.format(self.resolve_name(node.value), node.attr)
+        raise StaticResolutionError("not a name: {}".format(ast.dump(node)))
+
+
+class OfflineBuilder(object):
+    """
+    Rebuilds the urlpatterns of an urlconf from the sources
+    """
+
+    def __init__(self, project_root=None):
+        self.project_root = os.path.abspath(project_root or getattr(settings, 'BASE_DIR', os.getcwd()))
+        self.modules = {}
+        self.classes = {}
+        self.stats = dict.fromkeys((
+            'static_urlconfs',
+            'imported_urlconfs',
+            'static_views',
+            'imported_views',
+            'static_serializers',
+            'imported_serializers',
+        ), 0)
+
+    def get_module(self, module_name):
+        """
+        Returns the SourceModule of a project module, None for the libraries
+        """
+        if module_name not in self.modules:
+            try:
+                path = os.path.abspath(find_source(module_name))
+            except StaticResolutionError:
+                path = None
+            if (path is None or not path.startswith(self.project_root + os.sep) or
+                    'site-packages' in path or 'dist-packages' in path):
+                self.modules[module_name] = None
+            else:
+                self.modules[module_name] = SourceModule(module_name, path)
+        return self.modules[module_name]
+
+    def split_path(self, dotted_path):
+        """
+        Returns the (module name, attribute) of a dotted path
+        """
+        module_name, _, attr = dotted_path.rpartition('.')
+        if not module_name:
+            raise StaticResolutionError("not an attribute path: {}".format(dotted_path))
+        return module_name, attr
+
+    def find_class(self, dotted_path):
+        """
+        Returns the (SourceModule, ClassDef) of a project class, following the
+        imports; None for the libraries classes
+        """
+        module_name, name = self.split_path(dotted_path)
+        module = self.get_module(module_name)
+        if module is None:
+            return None
+        if name in module.classes:
+            return module, module.classes[name]
+        if name in module.imports:
+            return self.find_class(module.imports[name])
+        raise StaticResolutionError("no class {}".format(dotted_path))
+
+    def get_urlpatterns(self, urlconf):
+        """
+        Returns the urlpatterns of an urlconf, importing it if it can't be read statically
+        """
+        module = self.get_module(urlconf)
+        if module is not None:
+            try:
+                urlpatterns = self.build_urlpatterns(module)
+                self.stats['static_urlconfs'] += 1
+                return urlpatterns
+            except StaticResolutionError as e:
+                logger.info("importing the urlconf %s: %s", urlconf, e)
+        self.stats['imported_urlconfs'] += 1
+        return import_string('{}.urlpatterns'.format(urlconf))
+
+    def get_urlconf_module(self, urlconf):
+        """
+        Returns a module holding the urlpatterns of an urlconf (named after it
+        for the include_module_paths and exclude_module_paths filters)
+        """
+        if self.get_module(urlconf) is None:
+            return import_object(urlconf)
+        urlconf_module = types.ModuleType(str(urlconf))
+        urlconf_module.urlpatterns = self.get_urlpatterns(urlconf)
+        return urlconf_module
+
+    def build_urlpatterns(self, module):
+        if 'urlpatterns' not in module.assignments:
+            raise StaticResolutionError("no urlpatterns in {}".format(module.name))
+        urlpatterns = []
+        for node in module.assignments['urlpatterns']:
+            urlpatterns.extend(self.build_pattern_list(module, node))
+        return urlpatterns
+
+    def build_pattern_list(self, module, node):
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self.build_pattern(module, element) for element in node.elts]
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return self.build_pattern_list(module, node.left) + self.build_pattern_list(module, node.right)
+        if isinstance(node, ast.Call) and module.resolve_name(node.func).endswith('.patterns'):
+            prefix = literal(node.args[0]) if node.args else ''
+            if prefix:
+                raise StaticResolutionError("patterns() view prefixes are not supported")
+            return [self.build_pattern(module, element) for element in node.args[1:]]
+        if isinstance(node, ast.Name) and node.id in module.assignments:
+            patterns = []
+            for value in module.assignments[node.id]:
+                patterns.extend(self.build_pattern_list(module, value))
+            return patterns
+        raise StaticResolutionError("computed urlpatterns in {}".format(module.name))
+
+    def build_pattern(self, module, node):
+        if not isinstance(node, ast.Call) or not module.resolve_name(node.func).endswith('.url'):
+            raise StaticResolutionError("not an url() in {}".format(module.name))
+        args = list(node.args)
+        kwargs = dict((keyword.arg, keyword.value) for keyword in node.keywords)
+        regex = literal(args[0])
+        view = args[1] if len(args) > 1 else kwargs.pop('view')
+        url_kwargs = args[2] if len(args) > 2 else kwargs.get('kwargs')
+        name = args[3] if len(args) > 3 else kwargs.get('name')
+        return url(
+            regex,
+            self.build_view(module, view),
+            literal(url_kwargs) if url_kwargs is not None else None,
+            literal(name) if name is not None else None,
+        )
+
+    def build_view(self, module, node):
+        """
+        Returns the view (or the include()) of an url() call
+        """
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and func.attr == 'as_view':
+                initkwargs = dict((keyword.arg, literal(keyword.value)) for keyword in node.keywords)
+                return self.get_view_class(module.resolve_name(func.value)).as_view(**initkwargs)
+            if module.resolve_name(func).endswith('.include'):
+                return self.build_include(module, node)
+        # function views are imported
+        return import_object(module.resolve_name(node))
+
+    def build_include(self, module, node):
+        kwargs = dict((keyword.arg, literal(keyword.value)) for keyword in node.keywords)
+        target = node.args[0]
+        try:
+            urlconf = literal(target)
+        except StaticResolutionError:
+            urlconf = None
+        if isinstance(urlconf, six.string_types):
+            return include(self.get_urlconf_module(urlconf), **kwargs)
+        if isinstance(target, (ast.List, ast.Tuple)):
+            return include(self.build_pattern_list(module, target), **kwargs)
+        # i.e. admin.site.urls
+        dotted_path = module.resolve_name(target)
+        if self.get_module(dotted_path) is not None:
+            return include(self.get_urlconf_module(dotted_path), **kwargs)
+        return include(import_object(dotted_path), **kwargs)
+
+    def is_project_class(self, dotted_path):
+        try:
+            return self.find_class(dotted_path) is not None
+        except StaticResolutionError:
+            # i.e. a module attribute, imported
+            return True
+
+    def get_view_class(self, dotted_path):
+        if not self.is_project_class(dotted_path):
+            return import_object(dotted_path)
+        if dotted_path not in self.classes:
+            try:
+                self.classes[dotted_path] = self.build_class(dotted_path, 'view')
+                self.stats['static_views'] += 1
+            except StaticResolutionError as e:
+                logger.info("importing the view %s: %s", dotted_path, e)
+                self.classes[dotted_path] = import_object(dotted_path)
+                self.stats['imported_views'] += 1
+        return self.classes[dotted_path]
+
+    def get_serializer_class(self, dotted_path):
+        if not self.is_project_class(dotted_path):
+            return import_object(dotted_path)
+        if dotted_path not in self.classes:
+            try:
+                self.classes[dotted_path] = self.build_class(dotted_path, 'serializer')
+                self.stats['static_serializers'] += 1
+            except StaticResolutionError as e:
+                logger.info("importing the serializer %s: %s", dotted_path, e)
+                self.classes[dotted_path] = import_object(dotted_path)
+                self.stats['imported_serializers'] += 1
+        return self.classes[dotted_path]
+
+    def build_class(self, dotted_path, kind):
+        """
+        Rebuilds a project class from its source (imports the libraries ones)
+        """
+        found = self.find_class(dotted_path)
+        if found is None:
+            return import_object(dotted_path)
+        module, class_node = found
+
+        bases = tuple(self.build_class(module.resolve_name(base), kind) for base in class_node.bases) or (object,)
+        attrs = {
+            '__module__': module.name,
+            '__doc__': ast.get_docstring(class_node, clean=False),
+        }
+        for node in class_node.body:
+            if isinstance(node, ast.FunctionDef):
+                attrs.update(self.build_method(node, kind))
+            elif isinstance(node, ast.Assign):
+                for target in node.targets:
+                    if not isinstance(target, ast.Name):
+                        raise StaticResolutionError("computed attribute in {}".format(dotted_path))
+                    if kind == 'view' and target.id in IGNORED_VIEW_ATTRIBUTES:
+                        continue
+                    attrs[target.id] = self.build_value(module, node.value, kind, target.id)
+            elif isinstance(node, ast.ClassDef) and node.name == 'Meta':
+                attrs['Meta'] = self.build_meta(module, node)
+            elif isinstance(node, (ast.Pass, ast.Expr)):
+                # the docstring
+                continue
+            else:
+                raise StaticResolutionError("unsupported statement in {}".format(dotted_path))
+        return type(str(class_node.name), bases, attrs)
+
+    def build_method(self, node, kind):
+        """
+        Returns {name: stub} for a view handler, keeping its docstring
+        """
+        dynamic_methods = DYNAMIC_VIEW_METHODS if kind == 'view' else DYNAMIC_SERIALIZER_METHODS
+        if node.name in dynamic_methods:
+            raise StaticResolutionError("{}() is overridden".format(node.name))
+        if kind != 'view':
+            # serializer methods don't change the documented fields
+            return {}
+        if node.decorator_list:
+            # i.e. viewsets extra actions
+            raise StaticResolutionError("decorated method {}()".format(node.name))
+        if node.name not in HANDLER_METHODS:
+            # the other methods are left to the base classes
+            return {}
+
+        def method(self, request, *args, **kwargs):
+            raise MethodNotAllowed(request.method, detail="Offline views can't be served.")
+        method.__name__ = str(node.name)
+        method.__doc__ = ast.get_docstring(node, clean=False)
+        return {node.name: method}
+
+    def build_value(self, module, node, kind, name=None):
+        """
+        Evaluates a class attribute or a field argument
+        """
+        try:
+            return literal(node)
+        except StaticResolutionError:
+            pass
+        if isinstance(node, (ast.List, ast.Tuple)):
+            values = [self.build_value(module, element, kind) for element in node.elts]
+            return values if isinstance(node, ast.List) else tuple(values)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            # i.e. tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (MessagePackRenderer,)
+            left = self.build_value(module, node.left, kind, name)
+            right = self.build_value(module, node.right, kind, name)
+            if not isinstance(left, (list, tuple)) or type(left) is not type(right):
+                raise StaticResolutionError("computed value {}".format(name or ast.dump(node)))
+            return left + right
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ('list', 'tuple') and
+                node.func.id not in module.imports and len(node.args) == 1 and not node.keywords):
+            # a list or tuple copy
+            return getattr(builtins, node.func.id)(self.build_value(module, node.args[0], kind, name))
+        if isinstance(node, ast.Name) and len(module.assignments.get(node.id, ())) == 1:
+            # a module constant
+            return self.build_value(module, module.assignments[node.id][0], kind, name)
+        if isinstance(node, (ast.Name, ast.Attribute)):
+            dotted_path = module.resolve_name(node)
+            if kind == 'view' and name == 'serializer_class' or kind == 'serializer':
+                return self.get_serializer_class(dotted_path)
+            return import_object(dotted_path)
+        if isinstance(node, ast.Call) and kind == 'serializer':
+            # a declared field
+            field_class = self.build_value(module, node.func, kind)
+            args = [self.build_value(module, arg, kind) for arg in node.args]
+            kwargs = dict((keyword.arg, self.build_value(module, keyword.value, kind)) for keyword in node.keywords)
+            return field_class(*args, **kwargs)
+        raise StaticResolutionError("computed value {}".format(name or ast.dump(node)))
+
+    def build_meta(self, module, class_node):
+        attrs = {}
+        for node in class_node.body:
+            if isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
+                for target in node.targets:
+                    if target.id == 'model':
+                        attrs['model'] = import_object(module.resolve_name(node.value))
+                    else:
+                        attrs[target.id] = self.build_value(module, node.value, 'serializer', target.id)
+            elif not isinstance(node, (ast.Pass, ast.Expr)):
+                raise StaticResolutionError("unsupported statement in Meta")
+        return type(str('Meta'), (object,), attrs)
+
+
+def get_offline_url_index(urlconf=None, builder=None):
+    """
+    Returns the UrlIndex of an urlconf (ROOT_URLCONF by default) built from the sources
+    """
+    urlconf = urlconf or settings.ROOT_URLCONF
+    builder = builder or OfflineBuilder()
+    return UrlIndex(urlconf, builder.get_urlpatterns(urlconf))
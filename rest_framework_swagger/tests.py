@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.test import SimpleTestCase
+
+# modules only needed to generate the swagger documents
+GENERATION_MODULES = (
+    'rest_framework_swagger.dedupe',
+    'rest_framework_swagger.docgenerator',
+    'rest_framework_swagger.introspectors',
+    'rest_framework_swagger.urlparser',
+    'rest_framework_swagger.yamlparser',
+)
+
+# run in a fresh interpreter, prints the generation modules it imported
+IMPORT_SCRIPT = """
+import importlib, json, sys
+import django
+django.setup()
+from django.conf import settings
+import rest_framework_swagger.documents
+import rest_framework_swagger.views
+importlib.import_module(settings.ROOT_URLCONF)
+print(json.dumps([name for name in {modules!r} if name in sys.modules]))
+"""
+
+
+def run_python(script):
+    # the warm-up would generate the documents as django is set up
+    env = dict(os.environ, SWAGGER_WARMUP='')
+    return subprocess.check_output([sys.executable, '-c', script], cwd=settings.BASE_DIR, env=env)
+
+
+class DeferredImportsTests(SimpleTestCase):
+
+    def test_generation_modules_are_deferred(self):
+        """
+        The swagger views and the urlconf don't import the generation modules,
+        the first generated document does. Only checks which modules are
+        loaded, not how long the imports take.
+        """
+        output = run_python(IMPORT_SCRIPT.format(modules=GENERATION_MODULES))
+        imported = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        self.assertEqual(imported, [])
@@ -1,34 +1,49 @@
+import threading
 from importlib import import_module
 from django.core.urlresolvers import RegexURLResolver, RegexURLPattern
 from django.contrib.admindocs.views import simplify_regex
 from django.conf import settings
+from django.test.signals import setting_changed
 
 from rest_framework.views import APIView
 
 
-class UrlParser(object):
+class UrlIndex(object):
+    """
+    All the DRF APIViews of an urlconf, flattened once.
 
-    def __init__(self, config, request):
-        self.urlconf = settings.ROOT_URLCONF
-        self.exclude_namespaces = config.get('exclude_namespaces', [])
-        self.exclude_module_paths = config.get('exclude_module_paths', [])
-        self.include_module_paths = config.get('include_module_paths', [])
-        self.exclude_url_patterns = config.get('exclude_url_patterns', [])
-        self.exclude_url_patterns_names = config.get('exclude_url_patterns_names', [])
+    Each endpoint keeps the modules and namespaces of the resolvers it was
+    included from, so the per config filters (see UrlParser) are simple set
+    lookups over this list instead of a new walk of the url tree.
+    """
 
-    def get_apis(self):
+    def __init__(self, urlconf, urlpatterns=None):
+        self.urlconf = urlconf
+        if urlpatterns is None:
+            urlpatterns = import_module(urlconf).urlpatterns
+        self.endpoints = self.__flatten_patterns_tree__(urlpatterns)
+        self.filtered = {}
+        self.lock = threading.Lock()
+
+    def get_filtered(self, key, is_included):
         """
-        Returns all the DRF APIViews found in the project URLs
+        Returns (and remembers under key) the endpoints matching is_included
         """
-        urls = import_module(self.urlconf)
-        return self.__flatten_patterns_tree__(urls.urlpatterns)
-
-    def __assemble_endpoint_data__(self, pattern, prefix=''):
+        endpoints = self.filtered.get(key)
+        if endpoints is None:
+            endpoints = [endpoint for endpoint in self.endpoints if is_included(endpoint)]
+            with self.lock:
+                self.filtered[key] = endpoints
+        return endpoints
+
+    def __assemble_endpoint_data__(self, pattern, prefix='', modules=(), namespaces=()):
         """
         Creates a dictionary for matched API urls
 
         pattern -- the pattern to parse
         prefix -- the API path prefix (used by recursion)
+        modules -- the urlconf modules of the parent resolvers (used by recursion)
+        namespaces -- the namespaces of the parent resolvers (used by recursion)
         """
         callback = self.__get_pattern_api_callback__(pattern)
 
@@ -45,9 +60,13 @@ class UrlParser(object):
             'path': path,
             'pattern': pattern,
             'callback': callback,
+            'name': pattern.name,
+            'module': modules[-1] if modules else self.urlconf,
+            'modules': modules,
+            'namespaces': namespaces,
         }
 
-    def __flatten_patterns_tree__(self, patterns, prefix=''):
+    def __flatten_patterns_tree__(self, patterns, prefix='', modules=(), namespaces=()):
         """
         Uses recursion to flatten url tree.
 
@@ -59,36 +78,25 @@ class UrlParser(object):
         for pattern in patterns:
 
             if isinstance(pattern, RegexURLPattern):
-                endpoint_data = self.__assemble_endpoint_data__(pattern, prefix)
+                endpoint_data = self.__assemble_endpoint_data__(pattern, prefix, modules, namespaces)
 
                 if endpoint_data is None:
                     continue
 
-                if any(excluded in endpoint_data['path'] for excluded in self.exclude_url_patterns):
-                    continue
-
-                if endpoint_data['pattern'].name in self.exclude_url_patterns_names:
-                    continue
-
                 pattern_list.append(endpoint_data)
 
             elif isinstance(pattern, RegexURLResolver):
                 api_urls_module = pattern.urlconf_name.__name__ if hasattr(pattern.urlconf_name, '__name__') else ""
-                # only modules included on the include_module_paths list
-                if self.include_module_paths and api_urls_module not in self.include_module_paths:
-                    continue
-
-                # except modules included on the exclude_module_paths list
-                if api_urls_module in self.exclude_module_paths:
-                    continue
-
-                if pattern.namespace is not None and pattern.namespace in self.exclude_namespaces:
-                    continue
+                pattern_namespaces = namespaces
+                if pattern.namespace is not None:
+                    pattern_namespaces += (pattern.namespace,)
 
                 pref = prefix + pattern.regex.pattern
                 pattern_list.extend(self.__flatten_patterns_tree__(
                     pattern.url_patterns,
-                    prefix=pref
+                    prefix=pref,
+                    modules=modules + (api_urls_module,),
+                    namespaces=pattern_namespaces,
                 ))
 
         return pattern_list
@@ -120,3 +128,76 @@ class UrlParser(object):
         Excludes URL patterns that contain .{format}
         """
         return '.{format}' in path
+
+
+_url_indexes = {}
+
+
+def get_url_index(urlconf):
+    index = _url_indexes.get(urlconf)
+    if index is None:
+        index = _url_indexes[urlconf] = UrlIndex(urlconf)
+    return index
+
+
+def clear_url_indexes(*args, **kwargs):
+    if kwargs.get('setting') in (None, 'ROOT_URLCONF'):
+        _url_indexes.clear()
+
+
+setting_changed.connect(clear_url_indexes)
+
+
+class UrlParser(object):
+
+    def __init__(self, config, request, url_index=None):
+        """
+        config -- a CompiledConfig, its url filters are compiled once
+        url_index -- (optional) the UrlIndex of the endpoints, ROOT_URLCONF's by default
+        """
+        self.urlconf = settings.ROOT_URLCONF
+        self.config = config
+        self.url_index = url_index
+
+    def get_apis(self):
+        """
+        Returns all the DRF APIViews found in the project URLs
+        """
+        index = self.url_index or get_url_index(self.urlconf)
+        endpoints = index.get_filtered(self.get_filter_key(), self.is_included)
+        # the documentation generator modifies the endpoints, give it copies
+        return [
+            {
+                'path': endpoint['path'],
+                'pattern': endpoint['pattern'],
+                'callback': endpoint['callback'],
+            }
+            for endpoint in endpoints
+        ]
+
+    def get_filter_key(self):
+        return self.config.filter_key
+
+    def is_included(self, endpoint):
+        """
+        Applies the config filters on an indexed endpoint
+        """
+        config = self.config
+        # only modules included on the include_module_paths list
+        if config.include_module_paths and not config.include_module_paths.issuperset(endpoint['modules']):
+            return False
+
+        # except modules included on the exclude_module_paths list
+        if not config.exclude_module_paths.isdisjoint(endpoint['modules']):
+            return False
+
+        if not config.exclude_namespaces.isdisjoint(endpoint['namespaces']):
+            return False
+
+        if config.exclude_url_regex is not None and config.exclude_url_regex.search(endpoint['path']):
+            return False
+
+        if endpoint['name'] in config.exclude_url_patterns_names:
+            return False
+
+        return True
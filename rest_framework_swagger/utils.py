@@ -3,7 +3,7 @@ import rest_framework
 import inspect
 
 from rest_framework.compat import apply_markdown
-from .constants import INTROSPECTOR_PRIMITIVES
+from .constants import INTROSPECTOR_FORMATS, INTROSPECTOR_PRIMITIVES, UNDOCUMENTED_MEDIA_TYPES
 
 
 def get_serializer_name(serializer):
@@ -24,6 +24,18 @@ def get_serializer_name(serializer):
     return serializer.__class__.__name__
 
 
+def get_media_types(classes):
+    """
+    Returns the media types of renderer or parser classes, in order and without duplicates
+    """
+    media_types = []
+    for cls in classes:
+        media_type = cls.media_type.split(';')[0].strip()
+        if media_type not in media_types and media_type not in UNDOCUMENTED_MEDIA_TYPES:
+            media_types.append(media_type)
+    return media_types
+
+
 def get_view_description(view_cls, html=False, docstring=None):
     if docstring is not None:
         view_cls = type(
@@ -93,12 +105,7 @@ def normalize_data_format(data_type, data_format, obj):
     if data_type == 'array':
         data_format = None
 
-    flatten_primitives = [
-        val for sublist in INTROSPECTOR_PRIMITIVES.values()
-        for val in sublist
-    ]
-
-    if data_format not in flatten_primitives:
+    if data_format not in INTROSPECTOR_FORMATS:
         formats = INTROSPECTOR_PRIMITIVES.get(data_type, None)
         if formats:
             data_format = formats[0]
@@ -112,3 +119,21 @@ def normalize_data_format(data_type, data_format, obj):
         del obj['format']
     elif data_format is not None:
         obj['format'] = data_format
+
+
+def get_user_fingerprint(user):
+    """
+    Coarse permissions of a user (computed once per user object): the views
+    are expected to pick the same serializers for users of a same fingerprint
+    """
+    if user is None or not user.is_authenticated():
+        return ('anonymous',)
+    fingerprint = getattr(user, '_swagger_fingerprint', None)
+    if fingerprint is None:
+        if user.is_superuser:
+            fingerprint = ('superuser',)
+        else:
+            fingerprint = ('staff' if user.is_staff else 'authenticated',)
+            fingerprint += tuple(sorted(user.groups.values_list('name', flat=True)))
+        user._swagger_fingerprint = fingerprint
+    return fingerprint
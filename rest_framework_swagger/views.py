@@ -1,20 +1,13 @@
 from django.core.exceptions import PermissionDenied
-from .config import SwaggerConfig
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from .config import get_config
 
-from rest_framework.views import Response, APIView
-from rest_framework.settings import api_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 
-from .urlparser import UrlParser
-from .docgenerator import DocumentationGenerator
-
-try:
-    JSONRenderer = list(filter(
-        lambda item: item.format == 'json',
-        api_settings.DEFAULT_RENDERER_CLASSES,
-    ))[0]
-except IndexError:
-    from rest_framework.renderers import JSONRenderer
+from .documents import JSONRenderer, get_encoded_document, normalize_slice, stream_document
 
 
 class Swagger2JSONView(APIView):
@@ -24,21 +17,78 @@ class Swagger2JSONView(APIView):
     def get(self, request, *args, **kwargs):
         swagger_config_name = kwargs.get('swagger_config_name')
         self.check_permission(request, swagger_config_name)
-        paths = self.get_paths()
-        generator = DocumentationGenerator(
-            for_user=request.user,
-            config=self.config,
-            config_name=swagger_config_name,
-            request=request
+        tags = self.get_query_list(request, 'tags')
+        paths = self.get_query_list(request, 'path')
+        # huge documents can be streamed instead of being cached (but not their slices)
+        if self.config.get('stream') and not (tags or paths):
+            return self.streaming_response(request, swagger_config_name)
+        tags, paths = self.get_slice(request, swagger_config_name, tags, paths)
+        document = get_encoded_document(
+            self.config,
+            swagger_config_name,
+            user=request.user,
+            request=request,
+            tags=tags,
+            paths=paths,
+        )
+        return self.document_response(request, document)
+
+    def get_query_list(self, request, param):
+        """
+        Reads a (repeated and/or comma separated) query parameter i.e.:
+            ?tags=Product,Order&tags=User
+        """
+        values = set()
+        for value in request.query_params.getlist(param):
+            values.update(item.strip() for item in value.split(',') if item.strip())
+        return sorted(values)
+
+    def get_slice(self, request, swagger_config_name, tags, paths):
+        """
+        Drops the tags and paths the config doesn't know, a requested
+        tags or paths list knowing none of them is a bad request
+        """
+        known_tags, known_paths = normalize_slice(
+            self.config, swagger_config_name, user=request.user, request=request, tags=tags, paths=paths)
+        errors = {}
+        if tags and not known_tags:
+            errors['tags'] = ["Unknown tags: {}".format(", ".join(tags))]
+        if paths and not known_paths:
+            errors['path'] = ["Unknown paths: {}".format(", ".join(paths))]
+        if errors:
+            raise ValidationError(errors)
+        return known_tags, known_paths
+
+    def document_response(self, request, document):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH', '')
+        if document.etag in [etag.strip() for etag in if_none_match.split(',')]:
+            response = HttpResponseNotModified()
+        else:
+            content_encoding, body = document.negotiate(request.META.get('HTTP_ACCEPT_ENCODING'))
+            response = HttpResponse(body, content_type=document.content_type)
+            response['Content-Length'] = str(len(body))
+            if content_encoding != 'identity':
+                response['Content-Encoding'] = content_encoding
+        response['ETag'] = document.etag
+        return response
+
+    def streaming_response(self, request, swagger_config_name):
+        renderer = JSONRenderer()
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        return StreamingHttpResponse(
+            stream_document(self.config, swagger_config_name, user=request.user, request=request),
+            content_type=content_type,
         )
-        return Response(generator.get_root(paths))
 
-    def get_paths(self):
-        urlparser = UrlParser(self.config, self.request)
-        return urlparser.get_apis()
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(Swagger2JSONView, self).finalize_response(request, response, *args, **kwargs)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
 
     def check_permission(self, request, swagger_config_name):
-        self.config = SwaggerConfig().get_config(swagger_config_name)
+        self.config = get_config(swagger_config_name)
         if not self.has_permission(request):
             raise PermissionDenied()
 
@@ -1,14 +1,49 @@
 # -*- coding: utf-8 -*-
 
+import copy
 import yaml
 import importlib
 from django.utils import six
 from django.contrib.admindocs.utils import trim_docstring
+from django.test.signals import setting_changed
 from rest_framework.utils import formatting
 
 from .compat import OrderedDict
 from .utils import multi_getattr, normalize_data_format, get_serializer_name
 
+# docstring => (YAML object, YAML error)
+_yaml_objects = {}
+
+# (class path, calling module) => (class, None) or (LOAD_FAILED, error message)
+_loaded_classes = {}
+LOAD_FAILED = object()
+_load_class_stats = {
+    'hits': 0,
+    'misses': 0,
+    'failures': 0,
+}
+
+
+def get_load_class_stats():
+    """
+    Counts of the class references resolved by YAMLDocstringParser._load_class
+    """
+    stats = dict(_load_class_stats)
+    stats['cached'] = len(_loaded_classes)
+    return stats
+
+
+def clear_yaml_caches(*args, **kwargs):
+    """
+    The loaded classes (and the failures) depend on the installed apps and
+    modules, any setting change forgets them
+    """
+    _yaml_objects.clear()
+    _loaded_classes.clear()
+
+
+setting_changed.connect(clear_yaml_caches)
+
 
 class YAMLDocstringParser(object):
     """
@@ -165,7 +200,21 @@ class YAMLDocstringParser(object):
             self.object = {}
 
     def load_obj_from_docstring(self, docstring):
-        """Loads YAML from docstring"""
+        """
+        Loads YAML from docstring.
+        Each docstring is parsed once, callers get their own copy of the object.
+        """
+        if docstring not in _yaml_objects:
+            _yaml_objects[docstring] = self._parse_docstring(docstring)
+        obj, error = _yaml_objects[docstring]
+        if error is not None:
+            self.yaml_error = error
+        return copy.deepcopy(obj)
+
+    def _parse_docstring(self, docstring):
+        """
+        Returns the (object, error) parsed from the YAML part of the docstring
+        """
         split_lines = trim_docstring(docstring).split('\n')
 
         # Cut YAML from rest of docstring
@@ -175,29 +224,47 @@ class YAMLDocstringParser(object):
                 cut_from = index
                 break
         else:
-            return None
+            return None, None
 
         yaml_string = "\n".join(split_lines[cut_from:])
         yaml_string = formatting.dedent(yaml_string)
         try:
-            return yaml.load(yaml_string)
+            return yaml.load(yaml_string), None
         except yaml.YAMLError as e:
-            self.yaml_error = e
-            return None
+            return None, e
 
     def _load_class(self, cls_path, callback):
         """
-        Dynamically load a class from a string
+        Dynamically load a class from a string.
+        Each (class path, module) is resolved once, failures included (their
+        message only, a new exception is raised each time).
         """
         if not cls_path or not callback or not hasattr(callback, '__module__'):
             return None
 
+        key = (cls_path, self.method_introspector.get_module())
+        if key in _loaded_classes:
+            _load_class_stats['hits'] += 1
+        else:
+            _load_class_stats['misses'] += 1
+            try:
+                _loaded_classes[key] = (self._resolve_class(*key), None)
+            except Exception as e:
+                _load_class_stats['failures'] += 1
+                _loaded_classes[key] = (LOAD_FAILED, six.text_type(e))
+
+        class_obj, message = _loaded_classes[key]
+        if class_obj is LOAD_FAILED:
+            raise Exception(message)
+        return class_obj
+
+    def _resolve_class(self, cls_path, current_module):
         package = None
 
         if '.' not in cls_path:
             # within current module/file
             class_name = cls_path
-            module_path = self.method_introspector.get_module()
+            module_path = current_module
         else:
             # relative or fully qualified path import
             class_name = cls_path.split('.')[-1]
@@ -206,7 +273,7 @@ class YAMLDocstringParser(object):
             if cls_path.startswith('.'):
                 # relative lookup against current package
                 # ..serializers.FooSerializer
-                package = self.method_introspector.get_module()
+                package = current_module
 
         class_obj = None
         # Try to perform local or relative/fq import
@@ -221,11 +288,10 @@ class YAMLDocstringParser(object):
         # serializer: submodule.FooSerializer
         if class_obj is None:
             try:
-                module = importlib.import_module(
-                    self.method_introspector.get_module())
+                module = importlib.import_module(current_module)
                 class_obj = multi_getattr(module, cls_path, None)
             except (ImportError, AttributeError):
-                raise Exception("Could not find %s, looked in %s" % (cls_path, module))
+                raise Exception("Could not find %s, looked in %s" % (cls_path, current_module))
 
         return class_obj
 